@@ -0,0 +1,91 @@
+"""
+Compare ChatFilters.match with and without the compiled keyword matcher,
+against the old per-keyword substring loop.
+
+Run from the repository root:
+    python -m benchmarks.filter_matcher
+"""
+
+import os
+import random
+import string
+import timeit
+
+# bot.config insists on a token; none of this talks to Telegram. An empty
+# LANG_CACHE_PATH keeps the import from writing a language cache.
+os.environ.setdefault("BOT_TOKEN", "0:benchmark")
+os.environ.setdefault("LANG_CACHE_PATH", "")
+
+from bot.modules import filters  # noqa: E402
+
+SIZES = (10, 50, 100, 200, 500, 1_000, 10_000)
+MESSAGES = 200
+# One keyword in this many is a whole-word filter, like real chats mix them.
+WORD_EVERY = 10
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+
+def _old_loop(keywords: list[str], text: str) -> int | None:
+    text = text.lower()
+    for index, keyword in enumerate(keywords):
+        if keyword in text:
+            return index
+    return None
+
+
+def _chat_filters(rows: list, matcher: bool) -> "filters.ChatFilters":
+    threshold = filters.MATCHER_MIN_KEYWORDS
+    filters.MATCHER_MIN_KEYWORDS = 0 if matcher else len(rows) + 1
+    try:
+        return filters.ChatFilters(rows)
+    finally:
+        filters.MATCHER_MIN_KEYWORDS = threshold
+
+
+def main():
+    rng = random.Random(42)
+    messages = [
+        " ".join(_word(rng) for _ in range(rng.randint(3, 30))) for _ in range(MESSAGES)
+    ]
+
+    print(
+        f"{'keywords':>9} {'old loop':>9} {'scan':>9} {'matcher':>9}"
+        f" {'vs scan':>8}   (µs/msg)"
+    )
+    for size in SIZES:
+        keywords = [_word(rng) for _ in range(size)]
+        rows = [
+            (
+                keyword,
+                "reply",
+                filters.WORD if i % WORD_EVERY == 0 else filters.SUBSTRING,
+            )
+            for i, keyword in enumerate(keywords)
+        ]
+        scan = _chat_filters(rows, matcher=False)
+        compiled = _chat_filters(rows, matcher=True)
+
+        for text in messages:
+            assert scan.match(text) == compiled.match(text)
+
+        runs = max(1, 20_000 // size)
+        timings = [
+            timeit.timeit(lambda: [match(t) for t in messages], number=runs)
+            for match in (
+                lambda t: _old_loop(keywords, t),
+                scan.match,
+                compiled.match,
+            )
+        ]
+        old, scanned, matched = (t * 1e6 / (runs * MESSAGES) for t in timings)
+        print(
+            f"{size:>9} {old:>9.1f} {scanned:>9.1f} {matched:>9.1f}"
+            f" {scanned / matched:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,87 @@
+import asyncio
 import logging
-from telegram.ext import Application
-from bot.config import Config
-from bot.utils.language import lang_manager, get_string, get_msg_string
+import time
+
+# Reported by `python -m bot --profile-startup`.
+STARTED_AT = time.perf_counter()
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
 )
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+from bot.config import Config
+from bot.utils.language import (
+    lang_manager,
+    get_string,
+    get_msg_string,
+    load_chat_language,
+)
+from bot.utils import cache, storage
+from bot.utils.processor import ChatUpdateProcessor
+
 logger = logging.getLogger(__name__)
 
+_stats_task: asyncio.Task | None = None
+
+
+def _log_stats(application: Application) -> None:
+    """Log write-behind queue, cache and update processor counters."""
+    logger.info(f"Write-behind queues: {storage.stats()}")
+    logger.info(f"Caches: {cache.stats()}")
+    processor = application.update_processor
+    if isinstance(processor, ChatUpdateProcessor):
+        busiest = sorted(processor.depths().items(), key=lambda item: -item[1])
+        logger.info(f"Updates: {processor.stats()}, busiest chats: {busiest[:5]}")
+
+
+async def _report_stats(application: Application, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            _log_stats(application)
+        except Exception:
+            logger.exception("Stats report failed")
+
+
+async def _post_init(application: Application) -> None:
+    global _stats_task
+    lang_manager.start_watching(Config.LANG_RELOAD_INTERVAL)
+    if Config.STATS_LOG_INTERVAL > 0:
+        _stats_task = asyncio.create_task(
+            _report_stats(application, Config.STATS_LOG_INTERVAL)
+        )
+    removed = await storage.collect_note_bodies()
+    if removed:
+        logger.info(f"Removed {removed} unreferenced note bodies")
+
+
+async def _load_language(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Cache the chat's language off the event loop before any handler runs."""
+    chat = update.effective_chat
+    if chat and chat.type != chat.PRIVATE:
+        await load_chat_language(chat.id)
+
+
+async def _post_shutdown(application: Application) -> None:
+    if _stats_task is not None:
+        _stats_task.cancel()
+    lang_manager.stop_watching()
+    await storage.shutdown()
+
 
 def get_application() -> Application:
     if not Config.BOT_TOKEN:
         raise ValueError("BOT_TOKEN is not set in config!")
-    return Application.builder().token(Config.BOT_TOKEN).build()
+    builder = (
+        Application.builder()
+        .token(Config.BOT_TOKEN)
+        .post_init(_post_init)
+        .post_shutdown(_post_shutdown)
+    )
+    if Config.UPDATE_CONCURRENCY > 1:
+        builder.concurrent_updates(ChatUpdateProcessor(Config.UPDATE_CONCURRENCY))
+    application = builder.build()
+    application.add_handler(TypeHandler(Update, _load_language), group=-1)
+    return application
@@ -1,36 +1,109 @@
+import argparse
 import importlib
 import pkgutil
 import logging
+import sys
+import time
+from telegram import Update
 import bot.modules as modules
-from bot import get_application
+from bot import STARTED_AT, get_application
+from bot.config import Config
+from bot.utils.db import check_query_plans
+from bot.utils.help import freeze_help
 
 logger = logging.getLogger(__name__)
 
 
-def load_modules(application):
+def _module_enabled(name: str) -> bool:
+    """
+    Apply Config.MODULES_ALLOW / MODULES_DENY. Entries are names relative to
+    bot.modules ("github", "moderation.bans"); a package entry covers every
+    module inside it.
+    """
+    short = name.removeprefix(modules.__name__ + ".")
+
+    def covered(patterns):
+        return any(short == p or short.startswith(p + ".") for p in patterns)
+
+    if covered(Config.MODULES_DENY):
+        return False
+    if not Config.MODULES_ALLOW or covered(Config.MODULES_ALLOW):
+        return True
+    # Packages leading to an allowed module still have to be imported.
+    return any(p.startswith(short + ".") for p in Config.MODULES_ALLOW)
+
+
+def load_modules(application, profile=False):
+    timings = []
+
     def _load(package):
         for _, name, ispkg in pkgutil.iter_modules(
             package.__path__, package.__name__ + "."
         ):
+            if not _module_enabled(name):
+                logger.info(f"Skipped: {name}")
+                continue
             try:
+                start = time.perf_counter()
                 mod = importlib.import_module(name)
+                imported = time.perf_counter()
                 if ispkg:
                     _load(mod)
                 elif hasattr(mod, "__init_module__"):
                     mod.__init_module__(application)
                     logger.info(f"Loaded: {name}")
+                if not ispkg:
+                    timings.append(
+                        (name, imported - start, time.perf_counter() - imported)
+                    )
             except Exception as e:
                 logger.exception(f"Error loading {name}: {e}")
 
     _load(modules)
 
+    if profile:
+        timings.sort(key=lambda t: t[1] + t[2], reverse=True)
+        lines = [
+            f"{import_s * 1000:8.1f}ms {init_s * 1000:8.1f}ms  {name}"
+            for name, import_s, init_s in timings
+        ]
+        total = sum(t[1] + t[2] for t in timings) * 1000
+        logger.info(
+            "Module load times (import, __init_module__):\n"
+            + "\n".join(lines)
+            + f"\n{total:8.1f}ms total"
+        )
+
 
 def main():
+    parser = argparse.ArgumentParser(prog="bot")
+    parser.add_argument(
+        "--check-query-plans",
+        action="store_true",
+        help="exit non-zero if an indexed DB lookup falls back to a table scan",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="log how long each module takes to import and initialise",
+    )
+    args = parser.parse_args()
+
+    if args.check_query_plans:
+        problems = check_query_plans()
+        for problem in problems:
+            logger.error(f"Table scan in {problem}")
+        sys.exit(1 if problems else 0)
+
     try:
         application = get_application()
-        load_modules(application)
+        load_modules(application, profile=args.profile_startup)
+        freeze_help()
+        if args.profile_startup:
+            elapsed = (time.perf_counter() - STARTED_AT) * 1000
+            logger.info(f"Startup took {elapsed:.1f}ms")
         logger.info("Bot running...")
-        application.run_polling()
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
     except KeyboardInterrupt:
         logger.info("Stopped.")
     except Exception as e:
@@ -11,3 +11,52 @@ class Config:
 
     LANG_DIR = os.path.join(os.getcwd(), "bot", "languages")
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+
+    # Comma-separated names relative to bot.modules, e.g. "github,moderation.bans".
+    MODULES_ALLOW = [
+        m.strip() for m in os.getenv("MODULES_ALLOW", "").split(",") if m.strip()
+    ]
+    MODULES_DENY = [
+        m.strip() for m in os.getenv("MODULES_DENY", "").split(",") if m.strip()
+    ]
+
+    # Updates processed at once across chats; 1 keeps strict global ordering.
+    UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "1"))
+
+    LANG_RELOAD_INTERVAL = float(os.getenv("LANG_RELOAD_INTERVAL", "2"))
+    LANG_CACHE_PATH = os.getenv(
+        "LANG_CACHE_PATH", os.path.join(os.getcwd(), "bot", "data", "languages.cache")
+    )
+
+    USER_FLUSH_INTERVAL_MS = int(os.getenv("USER_FLUSH_INTERVAL_MS", "1000"))
+    USER_FLUSH_MAX_ROWS = int(os.getenv("USER_FLUSH_MAX_ROWS", "500"))
+
+    DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL").upper()
+    if DB_SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+        raise ValueError("DB_SYNCHRONOUS must be OFF, NORMAL, FULL or EXTRA")
+    DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", "-16000"))
+    DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(128 * 1024 * 1024)))
+    DB_BUSY_TIMEOUT = int(os.getenv("DB_BUSY_TIMEOUT", "5000"))
+    DB_READERS = int(os.getenv("DB_READERS", "4"))
+
+    FILTER_CACHE_ENTRIES = int(os.getenv("FILTER_CACHE_ENTRIES", "5000"))
+    FILTER_CACHE_BYTES = int(os.getenv("FILTER_CACHE_BYTES", str(64 * 1024 * 1024)))
+    FILTER_REGEX_TIMEOUT = float(os.getenv("FILTER_REGEX_TIMEOUT", "0.05"))
+
+    CHAT_SETTINGS_CACHE_ENTRIES = int(os.getenv("CHAT_SETTINGS_CACHE_ENTRIES", "10000"))
+
+    NOTE_INDEX_CACHE_ENTRIES = int(os.getenv("NOTE_INDEX_CACHE_ENTRIES", "5000"))
+    NOTE_INDEX_CACHE_BYTES = int(
+        os.getenv("NOTE_INDEX_CACHE_BYTES", str(32 * 1024 * 1024))
+    )
+    NOTE_CACHE_ENTRIES = int(os.getenv("NOTE_CACHE_ENTRIES", "2000"))
+    NOTE_CACHE_BYTES = int(os.getenv("NOTE_CACHE_BYTES", str(16 * 1024 * 1024)))
+    NOTE_COMPRESS_MIN_BYTES = int(os.getenv("NOTE_COMPRESS_MIN_BYTES", "256"))
+
+    ADMIN_CACHE_ENTRIES = int(os.getenv("ADMIN_CACHE_ENTRIES", "5000"))
+    ADMIN_CACHE_TTL = int(os.getenv("ADMIN_CACHE_TTL", "600"))
+    MODERATION_CHECK_TIMEOUT = float(os.getenv("MODERATION_CHECK_TIMEOUT", "10"))
+
+    # Seconds between log lines with write-behind queue, cache and update
+    # processor counters; 0 turns them off.
+    STATS_LOG_INTERVAL = float(os.getenv("STATS_LOG_INTERVAL", "300"))
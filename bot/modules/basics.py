@@ -1,14 +1,6 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
-from bot.utils.help import (
-    get_help_keyboard,
-    get_sections_keyboard,
-    get_module_help,
-    get_section_help,
-    get_section_parent,
-    get_string_helper,
-    register_module_help,
-)
+from bot.utils.help import get_menu, get_string_helper, register_module_help
 from bot.utils.message import reply_keyboard, edit_keyboard
 
 
@@ -16,80 +8,33 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     s, _ = get_string_helper(update)
 
     if context.args and context.args[0] == "help":
-        keyboard = InlineKeyboardMarkup(get_help_keyboard(s("common.back")))
-        await reply_keyboard(update, s("common.help"), keyboard)
+        await reply_keyboard(update, *get_menu(update, "help_main"))
         return
 
-    keyboard = InlineKeyboardMarkup(
-        [[InlineKeyboardButton(s("common.btn_help"), callback_data="help_main")]]
-    )
-
     if update.effective_chat.type != "private":
+        keyboard = InlineKeyboardMarkup(
+            [[InlineKeyboardButton(s("common.btn_help"), callback_data="help_main")]]
+        )
         await reply_keyboard(update, s("common.start_group"), keyboard)
         return
 
-    await reply_keyboard(update, s("common.start"), keyboard)
+    await reply_keyboard(update, *get_menu(update, "start_main"))
 
 
 async def menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    s, _ = get_string_helper(update)
-
-    if query.data == "start_main":
-        keyboard = InlineKeyboardMarkup(
-            [[InlineKeyboardButton(s("common.btn_help"), callback_data="help_main")]]
-        )
-        await edit_keyboard(update, s("common.start"), keyboard)
-
-    elif query.data == "help_main":
-        keyboard = InlineKeyboardMarkup(get_help_keyboard(s("common.back")))
-        await edit_keyboard(update, s("common.help"), keyboard)
-
-    elif query.data.startswith("help_mod_"):
-        mod_name = query.data.replace("help_mod_", "")
-        submenu = get_sections_keyboard(mod_name, s("common.back"))
 
-        if submenu:
-            help_key = get_module_help(mod_name)
-            await edit_keyboard(update, s(help_key), InlineKeyboardMarkup(submenu))
-        else:
-            help_key = get_module_help(mod_name)
-            if help_key:
-                keyboard = InlineKeyboardMarkup(
-                    [
-                        [
-                            InlineKeyboardButton(
-                                s("common.back"), callback_data="help_main"
-                            )
-                        ]
-                    ]
-                )
-                await edit_keyboard(update, s(help_key), keyboard)
-
-    elif query.data.startswith("help_sec_"):
-        label = query.data.replace("help_sec_", "")
-        help_key = get_section_help(label)
-        parent = get_section_parent(label)
-
-        if help_key:
-            keyboard = InlineKeyboardMarkup(
-                [
-                    [
-                        InlineKeyboardButton(
-                            s("common.back"), callback_data=f"help_mod_{parent}"
-                        )
-                    ]
-                ]
-            )
-            await edit_keyboard(update, s(help_key), keyboard)
+    menu = get_menu(update, query.data)
+    if menu:
+        await edit_keyboard(update, *menu)
 
 
 async def help_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     s, _ = get_string_helper(update)
 
     if update.effective_chat.type != "private":
-        bot_username = (await context.bot.get_me()).username
+        bot_username = context.bot.username
         keyboard = InlineKeyboardMarkup(
             [
                 [
@@ -103,8 +48,7 @@ async def help_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await reply_keyboard(update, s("common.help_pm"), keyboard)
         return
 
-    keyboard = InlineKeyboardMarkup(get_help_keyboard(s("common.back")))
-    await reply_keyboard(update, s("common.help"), keyboard)
+    await reply_keyboard(update, *get_menu(update, "help_main"))
 
 
 def __init_module__(application):
@@ -1,20 +1,198 @@
+import logging
 import re
+
+import regex
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler, MessageHandler, filters
 
+from bot.config import Config
 from bot.utils.admin import is_user_admin
+from bot.utils.cache import LRUCache
+from bot.utils.cooldown import allow_reply, get_cooldowns, set_cooldowns
 from bot.utils.help import get_string_helper, register_module_help
+from bot.utils.matcher import KeywordMatcher
 from bot.utils.message import reply, MD
-from bot.utils.db import (
+from bot.utils.template import Template, fill
+from bot.utils import db
+from bot.utils.storage import (
+    run_read,
     save_filter,
     delete_filter,
     list_filters,
-    get_filters,
     delete_all_filters,
 )
 
+logger = logging.getLogger(__name__)
+
+# Below this many keywords a plain substring scan beats the automaton; they
+# break even around 125 (see benchmarks/filter_matcher.py).
+MATCHER_MIN_KEYWORDS = 150
+
+# Rough per-object overheads used to keep the filter cache within its byte budget.
+_STR_OVERHEAD = 50
+_STATE_OVERHEAD = 240
+
+SUBSTRING, WORD, REGEX = "substring", "word", "regex"
+_MODE_FLAGS = {"-w": WORD, "-r": REGEX}
+
+# Backreferences, named groups, subroutine/recursion calls and global inline
+# flags would break or leak into the other filters once patterns are
+# combined: group numbers shift and (?0) would recurse into every filter.
+_UNSUPPORTED_REGEX = re.compile(
+    r"\\[1-9]|\\g<|\(\?P[<=>]|\(\?<\w|\(\?&|\(\?\(?[+-]?\d|\(\?[a-zA-Z-]+\)"
+)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _is_whole_word(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not _is_word_char(text[start - 1])) and (
+        end == len(text) or not _is_word_char(text[end])
+    )
+
+
+def _contains_word(text: str, keyword: str) -> bool:
+    start = text.find(keyword)
+    while start != -1:
+        if _is_whole_word(text, start, start + len(keyword)):
+            return True
+        start = text.find(keyword, start + 1)
+    return False
 
-def _parse_keyword(args: list[str]) -> tuple[str, list[str]]:
+
+def compile_filter_regex(pattern: str):
+    """Compile a single regex filter the way it will run inside the combined
+    chat pattern. Raises regex.error for patterns that can't be combined."""
+    if _UNSUPPORTED_REGEX.search(pattern):
+        raise regex.error(
+            "backreferences, named groups, subroutine calls and global flags "
+            "are not supported"
+        )
+    # On its own first, so "a)|(b" can't close the wrapping group and leak
+    # an alternative into the combined pattern.
+    regex.compile(pattern)
+    return regex.compile(f"(?:{pattern})", regex.IGNORECASE)
+
+
+class ChatFilters:
+    """
+    A chat's filters compiled for matching.
+    Substring and word keywords go through one scan (an Aho-Corasick matcher
+    for large sets); regex filters are joined into one alternation pattern.
+    Keyword filters are tried first, each in list order.
+    """
+
+    def __init__(self, rows: list[tuple[str, str, str]]):
+        self.keywords = [keyword for keyword, _, _ in rows]
+        self.responses = [response for _, response, _ in rows]
+        self.templates = [
+            Template(response, markdown=False) for response in self.responses
+        ]
+        self.modes = [mode for _, _, mode in rows]
+
+        self._plain = [i for i, mode in enumerate(self.modes) if mode != REGEX]
+        self.matcher = (
+            KeywordMatcher(self.keywords[i] for i in self._plain)
+            if len(self._plain) >= MATCHER_MIN_KEYWORDS
+            else None
+        )
+
+        patterns = [
+            f"(?P<f{i}>{self.keywords[i]})"
+            for i, mode in enumerate(self.modes)
+            if mode == REGEX
+        ]
+        self.regex = (
+            regex.compile("|".join(patterns), regex.IGNORECASE) if patterns else None
+        )
+
+        self.size = sum(
+            len(k) + len(r) + 2 * _STR_OVERHEAD
+            for k, r in zip(self.keywords, self.responses)
+        )
+        if self.matcher:
+            self.size += self.matcher.states * _STATE_OVERHEAD
+
+    def _match_keywords(self, text: str) -> int | None:
+        if not self.matcher:
+            for i in self._plain:
+                keyword = self.keywords[i]
+                if self.modes[i] == WORD:
+                    if _contains_word(text, keyword):
+                        return i
+                elif keyword in text:
+                    return i
+            return None
+
+        best = None
+        for end, index in self.matcher.iter_matches(text):
+            if best is not None and index >= best:
+                continue
+            i = self._plain[index]
+            if self.modes[i] == WORD and not _is_whole_word(
+                text, end - len(self.keywords[i]), end
+            ):
+                continue
+            best = index
+        return self._plain[best] if best is not None else None
+
+    def _match_regex(self, text: str) -> int | None:
+        try:
+            match = self.regex.search(text, timeout=Config.FILTER_REGEX_TIMEOUT)
+        except TimeoutError:
+            logger.warning("Regex filters timed out, skipping message")
+            return None
+        if not match:
+            return None
+        for name, value in match.groupdict().items():
+            if value is not None:
+                return int(name[1:])
+        return None
+
+    def match(self, text: str) -> int | None:
+        """Index of the filter that fires for `text`, if any."""
+        index = self._match_keywords(text.lower())
+        if index is None and self.regex:
+            index = self._match_regex(text)
+        return index
+
+
+def _load_chat_filters(chat_id: int) -> ChatFilters:
+    return ChatFilters(db.get_filters(chat_id))
+
+
+_compiled = LRUCache("filters", Config.FILTER_CACHE_ENTRIES, Config.FILTER_CACHE_BYTES)
+_generation = 0
+
+
+async def _get_chat_filters(chat_id: int) -> ChatFilters:
+    chat_filters = _compiled.get(chat_id)
+    if chat_filters is None:
+        generation = _generation
+        chat_filters = await run_read(_load_chat_filters, chat_id)
+        if _generation == generation:
+            _compiled.put(chat_id, chat_filters, chat_filters.size)
+    return chat_filters
+
+
+def _invalidate(chat_id: int) -> None:
+    global _generation
+    _generation += 1
+    _compiled.pop(chat_id)
+
+
+def _parse_mode(args: list[str]) -> tuple[str, list[str]]:
+    """Parses an optional match-mode flag in front of the keyword.
+    /filter -w oi resposta → ("word", ["oi", "resposta"])
+    """
+    if args and args[0].lower() in _MODE_FLAGS:
+        return _MODE_FLAGS[args[0].lower()], args[1:]
+    return SUBSTRING, args
+
+
+def _parse_keyword(args: list[str], lower: bool = True) -> tuple[str, list[str]]:
     """Parses keyword from args, supporting quoted keywords.
     Returns (keyword, remaining_args).
     /filter "bom dia" resposta → ("bom dia", ["resposta"])
@@ -23,23 +201,10 @@ def _parse_keyword(args: list[str]) -> tuple[str, list[str]]:
     raw = " ".join(args)
     match = re.match(r'^"(.+?)"\s*(.*)', raw, re.DOTALL)
     if match:
-        return match.group(1).lower().strip(), match.group(2).split()
-    return args[0].lower(), args[1:]
-
-
-def _fill_reply_vars(text: str, replied_user) -> str:
-    if not replied_user:
-        return (
-            text.replace("{mention}", "").replace("{username}", "").replace("{id}", "")
-        )
-
-    mention = (
-        f"@{replied_user.username}" if replied_user.username else replied_user.full_name
-    )
-    text = text.replace("{mention}", mention)
-    text = text.replace("{username}", replied_user.username or replied_user.full_name)
-    text = text.replace("{id}", str(replied_user.id))
-    return text
+        keyword, remaining = match.group(1).strip(), match.group(2).split()
+    else:
+        keyword, remaining = args[0], args[1:]
+    return (keyword.lower() if lower else keyword), remaining
 
 
 async def filter_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -48,10 +213,17 @@ async def filter_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not await is_user_admin(update):
         return await reply(update, s("common.user_not_admin"))
 
-    if not context.args:
+    mode, args = _parse_mode(context.args or [])
+    if not args:
         return await reply(update, s("filters.save_usage"))
 
-    keyword, remaining = _parse_keyword(context.args)
+    keyword, remaining = _parse_keyword(args, lower=mode != REGEX)
+
+    if mode == REGEX:
+        try:
+            compile_filter_regex(keyword)
+        except regex.error as err:
+            return await reply(update, s("filters.invalid_regex", error=e(err)))
 
     if update.message.reply_to_message:
         replied = update.message.reply_to_message
@@ -63,7 +235,8 @@ async def filter_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return await reply(update, s("filters.save_usage"))
         response = " ".join(remaining)
 
-    save_filter(update.effective_chat.id, keyword, response)
+    await save_filter(update.effective_chat.id, keyword, response, mode)
+    _invalidate(update.effective_chat.id)
     await reply(update, s("filters.save_success", keyword=e(keyword)))
 
 
@@ -76,11 +249,13 @@ async def filter_remove(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args:
         return await reply(update, s("filters.remove_usage"))
 
-    keyword, _ = _parse_keyword(context.args)
-    deleted = delete_filter(update.effective_chat.id, keyword)
+    keyword, _ = _parse_keyword(context.args, lower=False)
+    deleted = await delete_filter(update.effective_chat.id, keyword)
+    _invalidate(update.effective_chat.id)
 
-    key = "filters.remove_success" if deleted else "filters.not_found"
-    await reply(update, s(key, keyword=e(keyword)))
+    if deleted is None:
+        return await reply(update, s("filters.not_found", keyword=e(keyword)))
+    await reply(update, s("filters.remove_success", keyword=e(deleted)))
 
 
 async def filter_remove_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -89,13 +264,45 @@ async def filter_remove_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not await is_user_admin(update):
         return await reply(update, s("common.user_not_admin"))
 
-    delete_all_filters(update.effective_chat.id)
+    await delete_all_filters(update.effective_chat.id)
+    _invalidate(update.effective_chat.id)
     await reply(update, s("filters.remove_all_success"))
 
 
+async def filter_cooldown(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    s, e = get_string_helper(update)
+    chat_id = update.effective_chat.id
+
+    if not context.args:
+        trigger_seconds, chat_seconds = await get_cooldowns(chat_id)
+        return await reply(
+            update,
+            s(
+                "filters.cooldown_current",
+                trigger=e(trigger_seconds),
+                chat=e(chat_seconds),
+            ),
+        )
+
+    if not await is_user_admin(update):
+        return await reply(update, s("common.user_not_admin"))
+
+    values = context.args[:2]
+    if not all(v.isdecimal() for v in values):
+        return await reply(update, s("filters.cooldown_usage"))
+
+    trigger_seconds = int(values[0])
+    chat_seconds = int(values[1]) if len(values) > 1 else 0
+    await set_cooldowns(chat_id, trigger_seconds, chat_seconds)
+    await reply(
+        update,
+        s("filters.cooldown_set", trigger=e(trigger_seconds), chat=e(chat_seconds)),
+    )
+
+
 async def filter_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     s, e = get_string_helper(update)
-    keywords = list_filters(update.effective_chat.id)
+    keywords = await list_filters(update.effective_chat.id)
 
     if not keywords:
         return await reply(update, s("filters.empty"))
@@ -108,20 +315,21 @@ async def handle_filters(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not update.message or not update.message.text:
         return
 
-    text = update.message.text.lower()
-    chat_filters = get_filters(update.effective_chat.id)
+    chat_id = update.effective_chat.id
+    chat_filters = await _get_chat_filters(chat_id)
+    index = chat_filters.match(update.message.text)
+    if index is None:
+        return
+    if not await allow_reply(chat_id, chat_filters.keywords[index]):
+        return
 
     replied_user = (
         update.message.reply_to_message.from_user
         if update.message.reply_to_message
         else None
     )
-
-    for keyword, response in chat_filters:
-        if keyword in text:
-            response = _fill_reply_vars(response, replied_user)
-            await update.message.reply_text(response)
-            return
+    text = await fill(chat_filters.templates[index], update, replied_user)
+    await update.message.reply_text(text, parse_mode=MD)
 
 
 def __init_module__(application):
@@ -129,5 +337,6 @@ def __init_module__(application):
     application.add_handler(CommandHandler("unfilter", filter_remove))
     application.add_handler(CommandHandler("stopall", filter_remove_all))
     application.add_handler(CommandHandler("filters", filter_list))
+    application.add_handler(CommandHandler("filtercooldown", filter_cooldown))
     application.add_handler(MessageHandler(filters.TEXT, handle_filters), group=2)
     register_module_help("Filters", "filters.help")
@@ -1,11 +1,17 @@
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler
 from bot.utils.help import get_string_helper, register_module_help
+from bot.utils.lazy import lazy_import
 from bot.utils.message import reply
-from github import Github
-from github.GithubException import UnknownObjectException, GithubException
 import asyncio
 
+# PyGithub takes a few hundred ms to import; only pay that on first /github.
+pygithub = lazy_import("github")
+
+
+def _get_user(login: str):
+    return pygithub.Github().get_user(login)
+
 
 async def github(update: Update, context: ContextTypes.DEFAULT_TYPE):
     s, e = get_string_helper(update)
@@ -14,10 +20,10 @@ async def github(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await reply(update, s("github.no_args"))
 
     try:
-        user = await asyncio.to_thread(Github().get_user, context.args[0])
-    except UnknownObjectException:
+        user = await asyncio.to_thread(_get_user, context.args[0])
+    except pygithub.UnknownObjectException:
         return await reply(update, s("github.not_found"))
-    except GithubException:
+    except pygithub.GithubException:
         return await reply(update, s("github.error"))
 
     await reply(
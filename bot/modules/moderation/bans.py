@@ -3,7 +3,7 @@ from telegram.ext import ContextTypes, CommandHandler
 from telegram.error import TelegramError
 from bot.utils.help import get_string_helper, register_module_help
 from bot.utils.message import reply
-from bot.modules.moderation.common import check_common, get_member, _parse_args
+from bot.modules.moderation.common import check_common, _parse_args
 
 
 async def _execute_ban(update, user_id, until_date, kick, unban, delete_message):
@@ -15,6 +15,10 @@ async def _execute_ban(update, user_id, until_date, kick, unban, delete_message)
         await update.message.reply_to_message.delete()
 
 
+def _is_banned(member) -> bool:
+    return member is not None and member.status == ChatMember.BANNED
+
+
 async def _ban_common(
     update,
     context,
@@ -31,16 +35,16 @@ async def _ban_common(
         return await reply(update, s("moderation.common.reply_required"))
 
     user_id, display_name, ok = await check_common(
-        update, context, s, action, check_admin_target=not unban
+        update,
+        context,
+        s,
+        action,
+        check_admin_target=not unban,
+        require=(_is_banned, "moderation.ban.not_banned") if unban else None,
     )
     if not ok:
         return
 
-    if unban:
-        member = await get_member(update.effective_chat, user_id)
-        if not member or member.status != ChatMember.BANNED:
-            return await reply(update, s("moderation.ban.not_banned"))
-
     arg_offset = 0 if update.message.reply_to_message else 1
     until_date, duration_str, arg_offset = _parse_args(
         context, arg_offset, has_duration
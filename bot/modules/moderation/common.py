@@ -1,7 +1,9 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
-from telegram import Update, ChatMember, MessageEntity
+from telegram import Update, MessageEntity
 from telegram.error import TelegramError
-from bot.utils.admin import is_user_admin, bot_has_permission
+from bot.config import Config
+from bot.utils.admin import is_user_admin, bot_has_permission, get_admin_member
 from bot.utils.user import resolve_target
 from bot.utils.message import reply
 
@@ -48,19 +50,46 @@ async def guard(update, s, condition, key) -> bool:
     return False
 
 
-async def check_common(update, context, s, action, check_admin_target=True):
-    if await guard(update, s, not await is_user_admin(update), "common.user_not_admin"):
+async def _resolve_target_member(update, context, need_member):
+    user_id, display_name = await resolve_target(update, context)
+    member = None
+    if user_id and need_member:
+        member = await get_member(update.effective_chat, user_id)
+    return user_id, display_name, member
+
+
+async def check_common(
+    update, context, s, action, check_admin_target=True, require=None
+):
+    """
+    Validate a moderation command. The sender, bot and target lookups run
+    concurrently; their results are then checked in a fixed order so the
+    reply is the same as if they had run one after another.
+
+    `require` is an optional (predicate, string key) pair: the predicate gets
+    the target's ChatMember (None if unavailable) and the key is replied when
+    it returns False.
+    """
+    try:
+        is_admin, can_restrict, (user_id, display_name, member) = (
+            await asyncio.wait_for(
+                asyncio.gather(
+                    is_user_admin(update),
+                    bot_has_permission(update, "can_restrict_members"),
+                    _resolve_target_member(update, context, require is not None),
+                ),
+                Config.MODERATION_CHECK_TIMEOUT,
+            )
+        )
+    except asyncio.TimeoutError:
+        await reply(update, s("errors.unknown"))
         return None, None, False
 
-    if await guard(
-        update,
-        s,
-        not await bot_has_permission(update, "can_restrict_members"),
-        "moderation.common.bot_no_permission",
-    ):
+    if await guard(update, s, not is_admin, "common.user_not_admin"):
         return None, None, False
 
-    user_id, display_name = await resolve_target(update, context)
+    if await guard(update, s, not can_restrict, "moderation.common.bot_no_permission"):
+        return None, None, False
 
     if await guard(update, s, not user_id, "moderation.common.no_target"):
         return None, None, False
@@ -69,14 +98,17 @@ async def check_common(update, context, s, action, check_admin_target=True):
     ):
         return None, None, False
 
-    if check_admin_target:
-        member = await get_member(update.effective_chat, user_id)
-        if member and await guard(
-            update,
-            s,
-            member.status in (ChatMember.ADMINISTRATOR, ChatMember.OWNER),
-            f"moderation.{action}.admin",
-        ):
+    if check_admin_target and await guard(
+        update,
+        s,
+        await get_admin_member(update.effective_chat, user_id) is not None,
+        f"moderation.{action}.admin",
+    ):
+        return None, None, False
+
+    if require:
+        predicate, key = require
+        if await guard(update, s, not predicate(member), key):
             return None, None, False
 
     return user_id, display_name, True
@@ -3,7 +3,11 @@ from telegram.ext import ContextTypes, CommandHandler
 from telegram.error import TelegramError
 from bot.utils.help import get_string_helper
 from bot.utils.message import reply
-from bot.modules.moderation.common import check_common, get_member, _parse_args
+from bot.modules.moderation.common import check_common, _parse_args
+
+
+def _is_muted(member) -> bool:
+    return member is not None and member.can_send_messages is False
 
 
 async def _mute_common(
@@ -14,15 +18,16 @@ async def _mute_common(
     if force_reply and not update.message.reply_to_message:
         return await reply(update, s("moderation.common.reply_required"))
 
-    user_id, display_name, ok = await check_common(update, context, s, action)
+    user_id, display_name, ok = await check_common(
+        update,
+        context,
+        s,
+        action,
+        require=None if restrict else (_is_muted, "moderation.unmute.not_muted"),
+    )
     if not ok:
         return
 
-    if not restrict:
-        member = await get_member(update.effective_chat, user_id)
-        if not member or member.can_send_messages is not False:
-            return await reply(update, s("moderation.unmute.not_muted"))
-
     arg_offset = 0 if update.message.reply_to_message else 1
     until_date, duration_str, arg_offset = _parse_args(context, arg_offset, restrict)
     reason = " ".join(context.args[arg_offset:]) if context.args else None
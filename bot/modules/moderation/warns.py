@@ -4,7 +4,7 @@ from telegram.error import TelegramError
 from bot.utils.admin import is_user_admin
 from bot.utils.help import get_string_helper
 from bot.utils.message import reply
-from bot.utils.db import (
+from bot.utils.storage import (
     add_warn,
     get_warns,
     reset_warns,
@@ -24,13 +24,12 @@ async def warn(update: Update, context: ContextTypes.DEFAULT_TYPE):
     arg_offset = 0 if update.message.reply_to_message else 1
     reason = " ".join(context.args[arg_offset:]) if context.args else None
 
-    count = add_warn(update.effective_chat.id, user_id, reason)
-    limit = get_warn_limit(update.effective_chat.id)
+    count, limit = await add_warn(update.effective_chat.id, user_id, reason)
 
     if count >= limit:
         try:
             await update.effective_chat.ban_member(user_id)
-            reset_warns(update.effective_chat.id, user_id)
+            await reset_warns(update.effective_chat.id, user_id)
             await reply(
                 update,
                 s(
@@ -62,8 +61,8 @@ async def warns(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not ok:
         return
 
-    warn_list = get_warns(update.effective_chat.id, user_id)
-    limit = get_warn_limit(update.effective_chat.id)
+    warn_list = await get_warns(update.effective_chat.id, user_id)
+    limit = await get_warn_limit(update.effective_chat.id)
 
     if not warn_list:
         return await reply(update, s("moderation.warn.none", username=e(display_name)))
@@ -91,7 +90,7 @@ async def resetwarn(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not ok:
         return
 
-    reset_warns(update.effective_chat.id, user_id)
+    await reset_warns(update.effective_chat.id, user_id)
     await reply(update, s("moderation.warn.reset", username=e(display_name)))
 
 
@@ -105,7 +104,7 @@ async def warnlimit(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await reply(update, s("moderation.warn.limit_usage"))
 
     limit = int(context.args[0])
-    set_warn_limit(update.effective_chat.id, limit)
+    await set_warn_limit(update.effective_chat.id, limit)
     await reply(update, s("moderation.warn.limit_set", limit=e(limit)))
 
 
@@ -1,11 +1,47 @@
 from dataclasses import dataclass
-from telegram import Update, helpers
-from telegram.ext import ContextTypes, CommandHandler, MessageHandler, filters
-
+from telegram import (
+    Update,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InputMediaAudio,
+    InputMediaDocument,
+    InputMediaPhoto,
+    InputMediaVideo,
+    helpers,
+)
+from telegram.ext import (
+    ContextTypes,
+    CommandHandler,
+    CallbackQueryHandler,
+    MessageHandler,
+    filters,
+)
+
+from bot.config import Config
 from bot.utils.admin import is_user_admin
+from bot.utils.cache import LRUCache
+from bot.utils.cooldown import allow_replies
 from bot.utils.help import get_string_helper, register_module_help
-from bot.utils.message import reply, MD
-from bot.utils.db import get_note, get_note_by_index, save_note, delete_note, list_notes
+from bot.utils.message import reply, reply_keyboard, edit_keyboard, MD
+from bot.utils.template import get_template, fill
+from bot.utils.storage import (
+    get_notes,
+    get_note_by_index,
+    save_note,
+    delete_note,
+    list_notes,
+    list_notes_page,
+    get_missing_note_reply,
+    set_missing_note_reply,
+)
+
+NOTES_PAGE_SIZE = 20
+MAX_HASHTAGS = 10
+MAX_MESSAGE_LENGTH = 4096
+
+
+# Rough per-object overhead used for the note caches' byte budgets.
+_OBJ_OVERHEAD = 60
 
 
 @dataclass
@@ -41,19 +77,87 @@ def _extract_media(message) -> NoteMedia:
     return NoteMedia(None, None, None, None)
 
 
+async def _render_content(update: Update, note: NoteMedia) -> str | None:
+    if not note.content or note.parse_mode != MD:
+        return note.content
+    replied = update.message.reply_to_message
+    return await fill(
+        get_template(note.content), update, replied.from_user if replied else None
+    )
+
+
 async def _send_note(update: Update, note: NoteMedia) -> None:
     msg = update.message
     send_method = _MEDIA_TYPES.get(note.file_type) if note.file_type else None
+    content = await _render_content(update, note)
 
     if send_method:
-        kwargs = (
-            {"caption": note.content, "parse_mode": note.parse_mode}
-            if note.content
-            else {}
-        )
+        kwargs = {"caption": content, "parse_mode": note.parse_mode} if content else {}
         await getattr(msg, send_method)(note.file_id, **kwargs)
-    elif note.content:
-        await msg.reply_text(note.content, parse_mode=note.parse_mode)
+    elif content:
+        await msg.reply_text(content, parse_mode=note.parse_mode)
+
+
+# Media that Telegram can send together, by album: photos and videos mix,
+# documents and audio each need an album of their own.
+_MEDIA_GROUPS: dict[str, tuple[str, type]] = {
+    "photo": ("visual", InputMediaPhoto),
+    "video": ("visual", InputMediaVideo),
+    "document": ("document", InputMediaDocument),
+    "audio": ("audio", InputMediaAudio),
+}
+
+
+async def _send_notes(update: Update, notes: list[NoteMedia]) -> None:
+    """Send several notes with as few messages as possible: all text notes in
+    one reply, groupable media as albums, anything else on its own."""
+    texts = []
+    albums: dict[str, list] = {}
+    singles = []
+
+    for note in notes:
+        if not note.file_type:
+            content = await _render_content(update, note)
+            if content:
+                texts.append(
+                    content
+                    if note.parse_mode == MD
+                    else helpers.escape_markdown(content, version=2)
+                )
+        elif note.file_type in _MEDIA_GROUPS:
+            albums.setdefault(_MEDIA_GROUPS[note.file_type][0], []).append(note)
+        else:
+            singles.append(note)
+
+    chunk = ""
+    for text in texts:
+        if chunk and len(chunk) + len(text) + 2 > MAX_MESSAGE_LENGTH:
+            await update.message.reply_text(chunk, parse_mode=MD)
+            chunk = ""
+        chunk = f"{chunk}\n\n{text}" if chunk else text
+    if chunk:
+        await update.message.reply_text(chunk, parse_mode=MD)
+
+    for album in albums.values():
+        for i in range(0, len(album), 10):
+            batch = album[i : i + 10]
+            if len(batch) == 1:
+                await _send_note(update, batch[0])
+                continue
+            media = []
+            for note in batch:
+                content = await _render_content(update, note)
+                media.append(
+                    _MEDIA_GROUPS[note.file_type][1](
+                        note.file_id,
+                        caption=content,
+                        parse_mode=note.parse_mode if content else None,
+                    )
+                )
+            await update.message.reply_media_group(media)
+
+    for note in singles:
+        await _send_note(update, note)
 
 
 def _note_from_row(row: tuple) -> NoteMedia:
@@ -61,6 +165,102 @@ def _note_from_row(row: tuple) -> NoteMedia:
     return NoteMedia(content, parse_mode, file_id, file_type)
 
 
+# Every note name per chat, so unknown #hashtags are rejected without a query,
+# and the bodies of recently used notes.
+_note_names = LRUCache(
+    "note_names", Config.NOTE_INDEX_CACHE_ENTRIES, Config.NOTE_INDEX_CACHE_BYTES
+)
+_hot_notes = LRUCache("hot_notes", Config.NOTE_CACHE_ENTRIES, Config.NOTE_CACHE_BYTES)
+_missing_reply = LRUCache("missing_note_reply", Config.CHAT_SETTINGS_CACHE_ENTRIES)
+_generation = 0
+
+
+def _note_size(note: NoteMedia) -> int:
+    return len(note.content or "") + len(note.file_id or "") + 4 * _OBJ_OVERHEAD
+
+
+async def _get_note_names(chat_id: int) -> set[str]:
+    names = _note_names.get(chat_id)
+    if names is None:
+        generation = _generation
+        names = set(await list_notes(chat_id))
+        if _generation == generation:
+            size = sum(len(n) + _OBJ_OVERHEAD for n in names) + _OBJ_OVERHEAD
+            _note_names.put(chat_id, names, size)
+    return names
+
+
+async def _get_cached_notes(chat_id: int, names: list[str]) -> dict[str, NoteMedia]:
+    """Notes by name for those of `names` that exist, fetching every cache
+    miss with a single query."""
+    known = await _get_note_names(chat_id)
+    found = {}
+    missing = []
+    for name in names:
+        if name not in known:
+            continue
+        note = _hot_notes.get((chat_id, name))
+        if note is None:
+            missing.append(name)
+        else:
+            found[name] = note
+
+    if missing:
+        generation = _generation
+        for row in await get_notes(chat_id, missing):
+            note = _note_from_row(row)
+            found[row[0]] = note
+            if _generation == generation:
+                _hot_notes.put((chat_id, row[0]), note, _note_size(note))
+    return found
+
+
+def _invalidate(chat_id: int, name: str) -> None:
+    global _generation
+    _generation += 1
+    _note_names.pop(chat_id)
+    _hot_notes.pop((chat_id, name))
+
+
+async def _replies_when_missing(chat_id: int) -> bool:
+    enabled = _missing_reply.get(chat_id)
+    if enabled is None:
+        enabled = await get_missing_note_reply(chat_id)
+        _missing_reply.put(chat_id, enabled)
+    return enabled
+
+
+def _page_data(direction: str, start: int, cursor: str) -> str:
+    """Callback data for a /notes page button.
+    Carries the keyset cursor, or falls back to an offset when the name
+    does not fit in Telegram's 64-byte callback_data.
+    """
+    data = f"notes_{direction}_{start}_{cursor}"
+    return data if len(data.encode()) <= 64 else f"notes_o_{start}"
+
+
+def _notes_page(s, e, names, start, has_prev, has_next):
+    lines = "\n".join(f"`{start + i}`\\.  `#{e(n)}`" for i, n in enumerate(names))
+    text = f"*{s('notes.list_header')}*\n{lines}"
+
+    buttons = []
+    if has_prev:
+        prev_start = max(1, start - NOTES_PAGE_SIZE)
+        buttons.append(
+            InlineKeyboardButton(
+                s("notes.btn_prev"), callback_data=_page_data("p", prev_start, names[0])
+            )
+        )
+    if has_next:
+        buttons.append(
+            InlineKeyboardButton(
+                s("notes.btn_next"),
+                callback_data=_page_data("n", start + len(names), names[-1]),
+            )
+        )
+    return text, InlineKeyboardMarkup([buttons]) if buttons else None
+
+
 async def save(update: Update, context: ContextTypes.DEFAULT_TYPE):
     s, e = get_string_helper(update)
 
@@ -86,7 +286,7 @@ async def save(update: Update, context: ContextTypes.DEFAULT_TYPE):
             file_type=None,
         )
 
-    save_note(
+    await save_note(
         update.effective_chat.id,
         name,
         note.content,
@@ -94,6 +294,7 @@ async def save(update: Update, context: ContextTypes.DEFAULT_TYPE):
         note.file_id,
         note.file_type,
     )
+    _invalidate(update.effective_chat.id, name)
     await reply(update, s("notes.save_success", name=e(name)))
 
 
@@ -107,7 +308,8 @@ async def delnote(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await reply(update, s("notes.delnote_usage"))
 
     name = context.args[0].lower()
-    deleted = delete_note(update.effective_chat.id, name)
+    deleted = await delete_note(update.effective_chat.id, name)
+    _invalidate(update.effective_chat.id, name)
 
     key = "notes.delnote_success" if deleted else "notes.delnote_not_found"
     await reply(update, s(key, name=e(name)))
@@ -115,13 +317,49 @@ async def delnote(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def notes(update: Update, context: ContextTypes.DEFAULT_TYPE):
     s, e = get_string_helper(update)
-    note_list = list_notes(update.effective_chat.id)
+    names = await list_notes_page(update.effective_chat.id, NOTES_PAGE_SIZE + 1)
 
-    if not note_list:
+    if not names:
         return await reply(update, s("notes.empty"))
 
-    lines = "\n".join(f"`{i + 1}`\\.  `#{e(n)}`" for i, n in enumerate(note_list))
-    await reply(update, f"*{s('notes.list_header')}*\n{lines}")
+    has_next = len(names) > NOTES_PAGE_SIZE
+    text, keyboard = _notes_page(s, e, names[:NOTES_PAGE_SIZE], 1, False, has_next)
+
+    if keyboard:
+        await reply_keyboard(update, text, keyboard)
+    else:
+        await reply(update, text)
+
+
+async def notes_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    s, e = get_string_helper(update)
+    chat_id = update.effective_chat.id
+
+    _, direction, rest = query.data.split("_", 2)
+    start, _, cursor = rest.partition("_")
+    start = int(start)
+    fetch = NOTES_PAGE_SIZE + 1
+
+    if direction == "n":
+        names = await list_notes_page(chat_id, fetch, after=cursor)
+        has_prev, has_next = True, len(names) > NOTES_PAGE_SIZE
+        names = names[:NOTES_PAGE_SIZE]
+    elif direction == "p":
+        names = await list_notes_page(chat_id, fetch, before=cursor)
+        has_prev, has_next = len(names) > NOTES_PAGE_SIZE, True
+        names = names[-NOTES_PAGE_SIZE:]
+    else:
+        names = await list_notes_page(chat_id, fetch, offset=start - 1)
+        has_prev, has_next = start > 1, len(names) > NOTES_PAGE_SIZE
+        names = names[:NOTES_PAGE_SIZE]
+
+    if not names:
+        return await edit_keyboard(update, s("notes.empty"))
+
+    text, keyboard = _notes_page(s, e, names, start, has_prev, has_next)
+    await edit_keyboard(update, text, keyboard)
 
 
 async def get(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -130,7 +368,7 @@ async def get(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args or not context.args[0].isdigit():
         return await reply(update, s("notes.get_usage"))
 
-    result = get_note_by_index(update.effective_chat.id, int(context.args[0]))
+    result = await get_note_by_index(update.effective_chat.id, int(context.args[0]))
 
     if not result:
         return await reply(update, s("notes.not_found_index", index=e(context.args[0])))
@@ -138,20 +376,52 @@ async def get(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await _send_note(update, _note_from_row(result))
 
 
+def _hashtags(text: str) -> list[str]:
+    """Distinct note names tagged in `text`, split the way /save reads names."""
+    names = (word[1:].lower() for word in text.split() if word.startswith("#"))
+    return list(dict.fromkeys(name for name in names if name))[:MAX_HASHTAGS]
+
+
 async def handle_hashtag(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    text = update.message.text
-    name = text[1:].split()[0].lower() if text and text.startswith("#") else None
+    names = _hashtags(update.message.text or "")
 
-    if not name:
+    if not names:
         return
 
-    s, e = get_string_helper(update)
-    result = get_note(update.effective_chat.id, name)
+    chat_id = update.effective_chat.id
+    found = await _get_cached_notes(chat_id, names)
 
-    if not result:
-        return await reply(update, s("notes.not_found", name=e(name)))
+    if not found:
+        if await _replies_when_missing(chat_id):
+            s, e = get_string_helper(update)
+            await reply(update, s("notes.not_found", name=e(names[0])))
+        return
 
-    await _send_note(update, _note_from_row(result))
+    triggers = await allow_replies(
+        chat_id, [f"#{name}" for name in names if name in found]
+    )
+    notes = [found[trigger[1:]] for trigger in triggers]
+    if len(notes) == 1:
+        await _send_note(update, notes[0])
+    elif notes:
+        await _send_notes(update, notes)
+
+
+async def missing_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    s, _ = get_string_helper(update)
+
+    if not await is_user_admin(update):
+        return await reply(update, s("common.user_not_admin"))
+
+    arg = context.args[0].lower() if context.args else None
+    if arg not in ("on", "off"):
+        return await reply(update, s("notes.missing_reply_usage"))
+
+    enabled = arg == "on"
+    await set_missing_note_reply(update.effective_chat.id, enabled)
+    _missing_reply.put(update.effective_chat.id, enabled)
+    key = "notes.missing_reply_on" if enabled else "notes.missing_reply_off"
+    await reply(update, s(key))
 
 
 def __init_module__(application):
@@ -159,6 +429,8 @@ def __init_module__(application):
     application.add_handler(CommandHandler("delnote", delnote))
     application.add_handler(CommandHandler("notes", notes))
     application.add_handler(CommandHandler("get", get))
+    application.add_handler(CommandHandler("notfoundreply", missing_reply))
+    application.add_handler(CallbackQueryHandler(notes_page, pattern="^notes_"))
     application.add_handler(
         MessageHandler(filters.TEXT & filters.Regex(r"^#\w+"), handle_hashtag)
     )
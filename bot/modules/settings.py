@@ -3,8 +3,7 @@ from telegram.ext import ContextTypes, CommandHandler
 from bot.utils.admin import is_user_admin
 from bot.utils.help import get_string_helper, register_module_help, e_list
 from bot.utils.message import reply
-from bot.utils.db import set_chat_language
-from bot.utils.language import lang_manager
+from bot.utils.language import lang_manager, set_chat_language
 
 
 async def setlang(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -19,7 +18,8 @@ async def setlang(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await reply(update, s("settings.setlang_usage", langs=e_list(available)))
 
     lang = context.args[0].lower()
-    set_chat_language(update.effective_chat.id, lang)
+    await set_chat_language(update.effective_chat.id, lang)
+    s, _ = get_string_helper(update)
     await reply(update, s("settings.setlang_success", lang=lang))
 
 
@@ -1,24 +1,13 @@
 from telegram import Update, ChatMemberUpdated
 from telegram.ext import ContextTypes, MessageHandler, ChatMemberHandler, filters
-from bot.utils.user import get_user_id
-from bot.utils.db import get_db
+from bot.utils.admin import ADMIN_STATUSES, invalidate_admins
+from bot.utils.storage import queue_user, queue_chat_member
 
 
 def _save_user_to_db(user):
     if not user or user.is_bot:
         return
-    db = get_db()
-    db.execute(
-        """
-        INSERT INTO users (user_id, username, full_name)
-        VALUES (?, ?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET
-            username = excluded.username,
-            full_name = excluded.full_name
-        """,
-        (user.id, user.username, user.full_name),
-    )
-    db.commit()
+    queue_user(user.id, user.username, user.full_name)
 
 
 async def _save_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -26,13 +15,29 @@ async def _save_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not user or user.is_bot:
         return
     _save_user_to_db(user)
+    chat = update.effective_chat
+    if chat and chat.type != chat.PRIVATE:
+        queue_chat_member(chat.id, user.id)
 
 
 async def _save_chat_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
     member_update: ChatMemberUpdated = update.chat_member
     if not member_update:
         return
-    _save_user_to_db(member_update.new_chat_member.user)
+    new_member = member_update.new_chat_member
+    _save_user_to_db(new_member.user)
+    if not new_member.user.is_bot:
+        queue_chat_member(member_update.chat.id, new_member.user.id, new_member.status)
+    if (
+        member_update.old_chat_member.status in ADMIN_STATUSES
+        or new_member.status in ADMIN_STATUSES
+    ):
+        invalidate_admins(member_update.chat.id)
+
+
+async def _bot_member_changed(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.my_chat_member:
+        invalidate_admins(update.my_chat_member.chat.id)
 
 
 def __init_module__(application):
@@ -40,3 +45,7 @@ def __init_module__(application):
     application.add_handler(
         ChatMemberHandler(_save_chat_member, ChatMemberHandler.CHAT_MEMBER), group=1
     )
+    application.add_handler(
+        ChatMemberHandler(_bot_member_changed, ChatMemberHandler.MY_CHAT_MEMBER),
+        group=1,
+    )
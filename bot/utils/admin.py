@@ -1,18 +1,89 @@
+import asyncio
+import time
+
 from telegram import Update, ChatMember
 from telegram.error import TelegramError
 
+from bot.config import Config
+from bot.utils.cache import LRUCache
+
+ADMIN_STATUSES = (ChatMember.ADMINISTRATOR, ChatMember.OWNER)
+
+# chat_id -> (expires at, {user_id: ChatMember}) from get_chat_administrators.
+_rosters = LRUCache("admin_rosters", Config.ADMIN_CACHE_ENTRIES)
+_generation = 0
+# In-flight roster fetches, so concurrent checks share one API call.
+_fetches: dict[int, asyncio.Future] = {}
+
+
+async def get_admins(chat) -> dict[int, ChatMember] | None:
+    """
+    The chat's administrators by user id, cached for ADMIN_CACHE_TTL seconds
+    and dropped early by invalidate_admins(). None in private chats and,
+    for the same TTL, when the roster can't be fetched.
+    """
+    if chat.type == chat.PRIVATE:
+        return None
+
+    entry = _rosters.get(chat.id)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+
+    fetch = _fetches.get(chat.id)
+    if fetch is None:
+        fetch = asyncio.ensure_future(_fetch_admins(chat))
+        _fetches[chat.id] = fetch
+        fetch.add_done_callback(lambda _: _fetches.pop(chat.id, None))
+    return await asyncio.shield(fetch)
+
+
+async def _fetch_admins(chat) -> dict[int, ChatMember] | None:
+    generation = _generation
+    try:
+        # Other admin bots are left out by default, and /ban must see them.
+        admins = await chat.get_administrators(return_bots=True)
+    except TelegramError:
+        # Cached too, so checks fall straight back to get_member.
+        roster = None
+    else:
+        roster = {member.user.id: member for member in admins}
+    if _generation == generation:
+        _rosters.put(chat.id, (time.monotonic() + Config.ADMIN_CACHE_TTL, roster))
+    return roster
+
+
+def invalidate_admins(chat_id: int) -> None:
+    global _generation
+    _generation += 1
+    _rosters.pop(chat_id)
+
+
+async def get_admin_member(chat, user_id: int) -> ChatMember | None:
+    """
+    `user_id`'s ChatMember if they are an admin or the owner, else None.
+    Falls back to get_member when the roster is unavailable.
+    """
+    roster = await get_admins(chat)
+    if roster is not None:
+        return roster.get(user_id)
+
+    try:
+        member = await chat.get_member(user_id)
+    except TelegramError:
+        return None
+    return member if member.status in ADMIN_STATUSES else None
+
 
 async def is_user_admin(update: Update) -> bool:
     """Check if the command sender is an admin or creator."""
-    member = await update.effective_chat.get_member(update.effective_user.id)
-    return member.status in (ChatMember.ADMINISTRATOR, ChatMember.OWNER)
+    chat = update.effective_chat
+    return await get_admin_member(chat, update.effective_user.id) is not None
 
 
 async def is_bot_admin(update: Update) -> bool:
     """Check if the bot is an admin in the chat."""
     bot_id = update.get_bot().id
-    member = await update.effective_chat.get_member(bot_id)
-    return member.status in (ChatMember.ADMINISTRATOR, ChatMember.OWNER)
+    return await get_admin_member(update.effective_chat, bot_id) is not None
 
 
 async def bot_has_permission(update: Update, permission: str) -> bool:
@@ -29,24 +100,18 @@ async def bot_has_permission(update: Update, permission: str) -> bool:
     - can_manage_chat
     - can_manage_video_chats
     """
-    try:
-        bot_id = update.get_bot().id
-        member = await update.effective_chat.get_member(bot_id)
-        if member.status != ChatMember.ADMINISTRATOR:
-            return False
-        return bool(getattr(member, permission, False))
-    except TelegramError:
+    bot_id = update.get_bot().id
+    member = await get_admin_member(update.effective_chat, bot_id)
+    if not member or member.status != ChatMember.ADMINISTRATOR:
         return False
+    return bool(getattr(member, permission, False))
 
 
 async def user_has_permission(update: Update, permission: str) -> bool:
     """Check if the command sender has a specific admin permission."""
-    try:
-        member = await update.effective_chat.get_member(update.effective_user.id)
-        if member.status == ChatMember.OWNER:
-            return True
-        if member.status != ChatMember.ADMINISTRATOR:
-            return False
-        return bool(getattr(member, permission, False))
-    except TelegramError:
+    member = await get_admin_member(update.effective_chat, update.effective_user.id)
+    if not member:
         return False
+    if member.status == ChatMember.OWNER:
+        return True
+    return bool(getattr(member, permission, False))
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_caches: dict[str, "LRUCache"] = {}
+
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by entry count and, optionally, by an
+    estimate of the bytes held. Every instance is registered by name so its
+    counters show up in stats().
+    """
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int = 0):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _caches[name] = self
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, value, size: int = 0) -> None:
+        self.pop(key)
+        if self.max_bytes and size > self.max_bytes:
+            return
+        self._data[key] = (value, size)
+        self.bytes += size
+        while len(self._data) > self.max_entries or (
+            self.max_bytes and self.bytes > self.max_bytes
+        ):
+            _, (_, evicted_size) = self._data.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default=None):
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self.bytes -= entry[1]
+        return entry[0]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def stats() -> dict[str, dict]:
+    """Counters of every cache created so far, keyed by cache name."""
+    return {name: cache.stats() for name, cache in _caches.items()}
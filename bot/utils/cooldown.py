@@ -0,0 +1,108 @@
+import time
+from typing import Hashable
+
+from bot.config import Config
+from bot.utils.cache import LRUCache
+from bot.utils.storage import get_reply_cooldowns, set_reply_cooldowns
+
+# Sweep expired entries once the table grows past this many keys.
+_SWEEP_AT = 4096
+
+
+class Cooldowns:
+    """
+    Expiry times keyed by (chat_id,) for chat-wide cooldowns and by
+    (chat_id, trigger) for per-trigger ones. Expired keys are dropped lazily.
+    """
+
+    def __init__(self):
+        self._until: dict[Hashable, float] = {}
+        self._sweep_at = _SWEEP_AT
+
+    def _active(self, key: Hashable, now: float) -> bool:
+        until = self._until.get(key)
+        if until is None:
+            return False
+        if until > now:
+            return True
+        del self._until[key]
+        return False
+
+    def allow(
+        self, chat_id: int, trigger: str, trigger_seconds: int, chat_seconds: int
+    ) -> bool:
+        """True if a reply to `trigger` may be sent now; arms the cooldowns if so."""
+        return bool(self.allow_many(chat_id, [trigger], trigger_seconds, chat_seconds))
+
+    def allow_many(
+        self,
+        chat_id: int,
+        triggers: list[str],
+        trigger_seconds: int,
+        chat_seconds: int,
+    ) -> list[str]:
+        """
+        The `triggers` that may be answered by one reply sent now. The chat
+        window is checked and armed once for the whole reply, the trigger
+        windows for each trigger.
+        """
+        now = time.monotonic()
+        if self._active((chat_id,), now):
+            return []
+        allowed = [t for t in triggers if not self._active((chat_id, t), now)]
+        if not allowed:
+            return []
+
+        if chat_seconds:
+            self._until[(chat_id,)] = now + chat_seconds
+        if trigger_seconds:
+            for trigger in allowed:
+                self._until[(chat_id, trigger)] = now + trigger_seconds
+        if len(self._until) >= self._sweep_at:
+            self._sweep(now)
+        return allowed
+
+    def reset(self, chat_id: int) -> None:
+        for key in [key for key in self._until if key[0] == chat_id]:
+            del self._until[key]
+
+    def _sweep(self, now: float) -> None:
+        self._until = {key: until for key, until in self._until.items() if until > now}
+        self._sweep_at = max(_SWEEP_AT, 2 * len(self._until))
+
+    def __len__(self) -> int:
+        return len(self._until)
+
+
+cooldowns = Cooldowns()
+_settings = LRUCache("reply_cooldowns", Config.CHAT_SETTINGS_CACHE_ENTRIES)
+
+
+async def get_cooldowns(chat_id: int) -> tuple[int, int]:
+    settings = _settings.get(chat_id)
+    if settings is None:
+        settings = await get_reply_cooldowns(chat_id)
+        _settings.put(chat_id, settings)
+    return settings
+
+
+async def set_cooldowns(chat_id: int, trigger_seconds: int, chat_seconds: int) -> None:
+    await set_reply_cooldowns(chat_id, trigger_seconds, chat_seconds)
+    _settings.put(chat_id, (trigger_seconds, chat_seconds))
+    cooldowns.reset(chat_id)
+
+
+async def allow_reply(chat_id: int, trigger: str) -> bool:
+    """Check and arm the chat's auto-reply cooldowns for `trigger`."""
+    trigger_seconds, chat_seconds = await get_cooldowns(chat_id)
+    if not trigger_seconds and not chat_seconds:
+        return True
+    return cooldowns.allow(chat_id, trigger, trigger_seconds, chat_seconds)
+
+
+async def allow_replies(chat_id: int, triggers: list[str]) -> list[str]:
+    """Like allow_reply() for several triggers answered by a single reply."""
+    trigger_seconds, chat_seconds = await get_cooldowns(chat_id)
+    if not trigger_seconds and not chat_seconds:
+        return list(triggers)
+    return cooldowns.allow_many(chat_id, triggers, trigger_seconds, chat_seconds)
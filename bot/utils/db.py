@@ -1,94 +1,447 @@
+import hashlib
+import json
 import sqlite3
+import logging
 import os
+import threading
+import zlib
+
+from bot.config import Config
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = os.path.join(os.getcwd(), "bot", "data", "bot.db")
 
 _conn: sqlite3.Connection | None = None
+_conn_lock = threading.Lock()
+_local = threading.local()
+_readers: list[sqlite3.Connection] = []
+
+# Whoever holds the username now; failing that, whoever held it before,
+# members of the chat first, most recent holder first.
+FIND_USER = """
+    SELECT users.user_id, users.username, users.full_name,
+        LOWER(users.username) IS username_history.username
+    FROM username_history
+    JOIN users ON users.user_id = username_history.user_id
+    LEFT JOIN chat_members ON chat_members.chat_id = ?
+        AND chat_members.user_id = username_history.user_id
+    WHERE username_history.username = ?
+    ORDER BY LOWER(users.username) IS NOT username_history.username,
+        chat_members.user_id IS NULL,
+        username_history.seen_at DESC
+    LIMIT 1
+"""
+GET_CHAT_MEMBER = """
+    SELECT users.username, users.full_name, chat_members.status
+    FROM chat_members JOIN users ON users.user_id = chat_members.user_id
+    WHERE chat_members.chat_id = ? AND chat_members.user_id = ?
+"""
+NOTE_COLUMNS = (
+    "SELECT notes.name, note_bodies.compressed, note_bodies.data FROM notes "
+    "JOIN note_bodies ON note_bodies.hash = notes.body_hash "
+)
+GET_NOTE_BY_INDEX = (
+    NOTE_COLUMNS + "WHERE notes.chat_id = ? AND notes.name = ("
+    "SELECT name FROM notes WHERE chat_id = ? ORDER BY name LIMIT 1 OFFSET ?)"
+)
+GET_NOTE_HASH = "SELECT body_hash FROM notes WHERE chat_id = ? AND name = ?"
+DELETE_NOTE = "DELETE FROM notes WHERE chat_id = ? AND name = ? RETURNING body_hash"
+DROP_NOTE_BODY = (
+    "DELETE FROM note_bodies WHERE hash = ? "
+    "AND NOT EXISTS (SELECT 1 FROM notes WHERE body_hash = ?)"
+)
+DROP_NOTE_BODIES = (
+    "DELETE FROM note_bodies WHERE NOT EXISTS "
+    "(SELECT 1 FROM notes WHERE notes.body_hash = note_bodies.hash)"
+)
+NOTES_AFTER = (
+    "SELECT name FROM notes WHERE chat_id = ? AND name > ? ORDER BY name LIMIT ?"
+)
+NOTES_BEFORE = (
+    "SELECT name FROM notes WHERE chat_id = ? AND name < ? "
+    "ORDER BY name DESC LIMIT ?"
+)
+NOTES_AT = "SELECT name FROM notes WHERE chat_id = ? ORDER BY name LIMIT ? OFFSET ?"
+BUMP_WARN_COUNT = """
+    INSERT INTO warn_counts (chat_id, user_id, count) VALUES (?, ?, 1)
+    ON CONFLICT(chat_id, user_id) DO UPDATE SET count = count + 1
+    RETURNING count, COALESCE(
+        (SELECT warn_limit FROM warn_settings
+         WHERE warn_settings.chat_id = warn_counts.chat_id),
+        3
+    )
+"""
+GET_WARNS = (
+    "SELECT reason, added_at FROM warns "
+    "WHERE chat_id = ? AND user_id = ? ORDER BY added_at"
+)
+RESET_WARNS = "DELETE FROM warns WHERE chat_id = ? AND user_id = ?"
+RESET_WARN_COUNT = "DELETE FROM warn_counts WHERE chat_id = ? AND user_id = ?"
+
+# Hot lookups that must be answered from an index; see check_query_plans().
+INDEXED_QUERIES: dict[str, tuple[str, tuple]] = {
+    "find_user": (FIND_USER, (0, "username")),
+    "get_chat_member": (GET_CHAT_MEMBER, (0, 0)),
+    "get_notes": (
+        NOTE_COLUMNS + "WHERE notes.chat_id = ? AND notes.name IN (?, ?)",
+        (0, "a", "b"),
+    ),
+    "get_note_by_index": (GET_NOTE_BY_INDEX, (0, 0, 0)),
+    "get_note_hash": (GET_NOTE_HASH, (0, "name")),
+    "delete_note": (DELETE_NOTE, (0, "name")),
+    "drop_note_body": (DROP_NOTE_BODY, (b"", b"")),
+    "notes_after": (NOTES_AFTER, (0, "name", 1)),
+    "notes_before": (NOTES_BEFORE, (0, "name", 1)),
+    "bump_warn_count": (BUMP_WARN_COUNT, (0, 0)),
+    "get_warns": (GET_WARNS, (0, 0)),
+    "reset_warns": (RESET_WARNS, (0, 0)),
+    "reset_warn_count": (RESET_WARN_COUNT, (0, 0)),
+}
+
+
+def _apply_pragmas(conn: sqlite3.Connection) -> None:
+    conn.execute(f"PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT)}")
+    conn.execute(f"PRAGMA synchronous = {Config.DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size = {int(Config.DB_CACHE_SIZE)}")
+    conn.execute(f"PRAGMA mmap_size = {int(Config.DB_MMAP_SIZE)}")
 
 
 def get_db() -> sqlite3.Connection:
+    """The single writer connection. Only the storage thread should write."""
     global _conn
-    if _conn is None:
-        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-        _conn = sqlite3.connect(DB_PATH)
-        _conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                user_id   INTEGER PRIMARY KEY,
-                username  TEXT,
-                full_name TEXT
-            )
+    if _conn is not None:
+        return _conn
+
+    with _conn_lock:
+        if _conn is None:
+            _conn = _open_writer()
+    return _conn
+
+
+def get_reader() -> sqlite3.Connection:
+    """A read-only connection owned by the calling thread."""
+    conn = getattr(_local, "reader", None)
+    if conn is None:
+        get_db()
+        conn = sqlite3.connect(
+            f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False
+        )
+        _apply_pragmas(conn)
+        conn.execute("PRAGMA query_only = ON")
+        _local.reader = conn
+        with _conn_lock:
+            _readers.append(conn)
+    return conn
+
+
+def close() -> None:
+    global _conn
+    with _conn_lock:
+        for conn in _readers:
+            conn.close()
+        _readers.clear()
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+
+def _add_note_media_columns(conn: sqlite3.Connection) -> None:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(notes)")}
+    for column in ("parse_mode", "file_id", "file_type"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE notes ADD COLUMN {column} TEXT")
+
+
+def _encode_note_body(
+    content: str | None,
+    parse_mode: str | None,
+    file_id: str | None,
+    file_type: str | None,
+) -> tuple[bytes, bool, bytes]:
+    """
+    Serialize a note body. Returns (sha256 of the body, compressed?, data);
+    bodies of NOTE_COMPRESS_MIN_BYTES or more are zlib-compressed.
+    """
+    raw = json.dumps(
+        [content, parse_mode, file_id, file_type],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+    digest = hashlib.sha256(raw).digest()
+    if len(raw) >= Config.NOTE_COMPRESS_MIN_BYTES:
+        packed = zlib.compress(raw)
+        if len(packed) < len(raw):
+            return digest, True, packed
+    return digest, False, raw
+
+
+def _decode_note_row(row) -> tuple:
+    name, compressed, data = row
+    raw = zlib.decompress(data) if compressed else data
+    return (name, *json.loads(raw))
+
+
+def _store_note_body(conn: sqlite3.Connection, *body) -> bytes:
+    digest, compressed, data = _encode_note_body(*body)
+    conn.execute(
+        "INSERT OR IGNORE INTO note_bodies (hash, compressed, data) VALUES (?, ?, ?)",
+        (digest, compressed, data),
+    )
+    return digest
+
+
+def _move_note_bodies(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE notes_new (
+            chat_id   INTEGER NOT NULL,
+            name      TEXT NOT NULL,
+            body_hash BLOB NOT NULL,
+            PRIMARY KEY (chat_id, name)
+        )
+        """)
+    rows = conn.execute(
+        "SELECT chat_id, name, content, parse_mode, file_id, file_type FROM notes"
+    ).fetchall()
+    for chat_id, name, *body in rows:
+        conn.execute(
+            "INSERT INTO notes_new (chat_id, name, body_hash) VALUES (?, ?, ?)",
+            (chat_id, name, _store_note_body(conn, *body)),
+        )
+    conn.execute("DROP TABLE notes")
+    conn.execute("ALTER TABLE notes_new RENAME TO notes")
+
+
+# Schema history, applied in order and tracked by PRAGMA user_version.
+# Each entry is one version step: SQL strings or callables taking the
+# connection. Append new steps; never edit ones that have shipped.
+MIGRATIONS: list[tuple] = [
+    (
         """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id   INTEGER PRIMARY KEY,
+            username  TEXT,
+            full_name TEXT
         )
-        _conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS chats (
-                chat_id  INTEGER PRIMARY KEY,
-                language TEXT NOT NULL DEFAULT 'en'
-            )
+        """,
         """
+        CREATE TABLE IF NOT EXISTS chats (
+            chat_id  INTEGER PRIMARY KEY,
+            language TEXT NOT NULL DEFAULT 'en'
         )
-        _conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS notes (
-                chat_id    INTEGER NOT NULL,
-                name       TEXT NOT NULL,
-                content    TEXT,
-                parse_mode TEXT,
-                file_id    TEXT,
-                file_type  TEXT,
-                PRIMARY KEY (chat_id, name)
-            )
+        """,
         """
+        CREATE TABLE IF NOT EXISTS notes (
+            chat_id    INTEGER NOT NULL,
+            name       TEXT NOT NULL,
+            content    TEXT,
+            parse_mode TEXT,
+            file_id    TEXT,
+            file_type  TEXT,
+            PRIMARY KEY (chat_id, name)
         )
-        _conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS warns (
-                id       INTEGER PRIMARY KEY AUTOINCREMENT,
-                chat_id  INTEGER NOT NULL,
-                user_id  INTEGER NOT NULL,
-                reason   TEXT,
-                added_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
+        """,
         """
+        CREATE TABLE IF NOT EXISTS warns (
+            id       INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id  INTEGER NOT NULL,
+            user_id  INTEGER NOT NULL,
+            reason   TEXT,
+            added_at TEXT DEFAULT CURRENT_TIMESTAMP
         )
-        _conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS warn_settings (
-                chat_id    INTEGER PRIMARY KEY,
-                warn_limit INTEGER NOT NULL DEFAULT 3
-            )
+        """,
         """
+        CREATE TABLE IF NOT EXISTS warn_settings (
+            chat_id    INTEGER PRIMARY KEY,
+            warn_limit INTEGER NOT NULL DEFAULT 3
         )
-        _conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS filters (
-                chat_id  INTEGER NOT NULL,
-                keyword  TEXT NOT NULL,
-                response TEXT NOT NULL,
-                PRIMARY KEY (chat_id, keyword)
-            )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS filters (
+            chat_id  INTEGER NOT NULL,
+            keyword  TEXT NOT NULL,
+            response TEXT NOT NULL,
+            PRIMARY KEY (chat_id, keyword)
+        )
+        """,
+        _add_note_media_columns,
+    ),
+    (
+        "CREATE INDEX IF NOT EXISTS idx_users_username ON users (LOWER(username))",
+        "CREATE INDEX IF NOT EXISTS idx_warns_chat_user "
+        "ON warns (chat_id, user_id, added_at)",
+        "UPDATE OR IGNORE notes SET name = LOWER(name) WHERE name <> LOWER(name)",
+    ),
+    (
         """
+        CREATE TABLE IF NOT EXISTS warn_counts (
+            chat_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            count   INTEGER NOT NULL,
+            PRIMARY KEY (chat_id, user_id)
+        )
+        """,
+        """
+        INSERT INTO warn_counts (chat_id, user_id, count)
+        SELECT chat_id, user_id, COUNT(*) FROM warns GROUP BY chat_id, user_id
+        """,
+    ),
+    ("ALTER TABLE filters ADD COLUMN mode TEXT NOT NULL DEFAULT 'substring'",),
+    (
+        "ALTER TABLE chats ADD COLUMN trigger_cooldown INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE chats ADD COLUMN chat_cooldown INTEGER NOT NULL DEFAULT 0",
+    ),
+    ("ALTER TABLE chats ADD COLUMN missing_note_reply INTEGER NOT NULL DEFAULT 1",),
+    (
+        """
+        CREATE TABLE IF NOT EXISTS note_bodies (
+            hash       BLOB PRIMARY KEY,
+            compressed INTEGER NOT NULL,
+            data       BLOB NOT NULL
+        ) WITHOUT ROWID
+        """,
+        _move_note_bodies,
+        "CREATE INDEX IF NOT EXISTS idx_notes_body_hash ON notes (body_hash)",
+    ),
+    (
+        """
+        CREATE TABLE IF NOT EXISTS chat_members (
+            chat_id   INTEGER NOT NULL,
+            user_id   INTEGER NOT NULL,
+            status    TEXT NOT NULL,
+            last_seen TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (chat_id, user_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS username_history (
+            username TEXT NOT NULL,
+            user_id  INTEGER NOT NULL,
+            seen_at  TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (username, user_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT OR IGNORE INTO username_history (username, user_id)
+        SELECT LOWER(username), user_id FROM users WHERE username IS NOT NULL
+        """,
+    ),
+]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending MIGRATIONS in one transaction. Returns the schema version."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= len(MIGRATIONS):
+        return version
+
+    conn.execute("BEGIN")
+    try:
+        for step in MIGRATIONS[version:]:
+            for statement in step:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+        conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    logger.info(f"Migrated database from version {version} to {len(MIGRATIONS)}")
+    return len(MIGRATIONS)
+
+
+def _open_writer() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    _apply_pragmas(conn)
+    migrate(conn)
+    return conn
+
+
+def check_query_plans(conn: sqlite3.Connection | None = None) -> list[str]:
+    """
+    Run EXPLAIN QUERY PLAN over INDEXED_QUERIES.
+    Returns one line per query that falls back to a table scan.
+    """
+    conn = conn or get_db()
+    problems = []
+    for name, (sql, params) in INDEXED_QUERIES.items():
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+            detail = row[-1]
+            if detail.startswith("SCAN"):
+                problems.append(f"{name}: {detail}")
+    return problems
+
+
+def save_users(rows: list[tuple[int, str | None, str]]) -> None:
+    """Upsert users and record their current usernames in username_history."""
+    db = get_db()
+    with db:
+        db.executemany(
+            """
+            INSERT INTO users (user_id, username, full_name)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                username = excluded.username,
+                full_name = excluded.full_name
+            """,
+            rows,
+        )
+        db.executemany(
+            """
+            INSERT INTO username_history (username, user_id) VALUES (?, ?)
+            ON CONFLICT(username, user_id) DO UPDATE SET seen_at = CURRENT_TIMESTAMP
+            """,
+            [(username.lower(), user_id) for user_id, username, _ in rows if username],
         )
-        _conn.commit()
-
-        for migration in [
-            "ALTER TABLE notes ADD COLUMN parse_mode TEXT",
-            "ALTER TABLE notes ADD COLUMN file_id TEXT",
-            "ALTER TABLE notes ADD COLUMN file_type TEXT",
-        ]:
-            try:
-                _conn.execute(migration)
-                _conn.commit()
-            except sqlite3.OperationalError:
-                pass
 
-    return _conn
+
+def save_chat_members(rows: list[tuple[int, int, str | None]]) -> None:
+    """
+    Upsert (chat_id, user_id, status) sightings. A None status means the
+    user was only seen talking: new rows become 'member', known rows keep
+    their status.
+    """
+    db = get_db()
+    db.executemany(
+        """
+        INSERT INTO chat_members (chat_id, user_id, status)
+        VALUES (?1, ?2, COALESCE(?3, 'member'))
+        ON CONFLICT(chat_id, user_id) DO UPDATE SET
+            status    = COALESCE(?3, status),
+            last_seen = CURRENT_TIMESTAMP
+        """,
+        rows,
+    )
+    db.commit()
+
+
+def find_user(chat_id: int, username: str) -> tuple[int, str | None, str, bool] | None:
+    """
+    (user_id, username, full_name, current) of whoever used `username`, or
+    None. `current` is False when the match is only a former holder.
+    """
+    row = (
+        get_reader()
+        .execute(FIND_USER, (chat_id, username.lstrip("@").lower()))
+        .fetchone()
+    )
+    return (*row[:3], bool(row[3])) if row else None
+
+
+def get_chat_member(chat_id: int, user_id: int) -> tuple[str | None, str, str] | None:
+    """(username, full_name, status) of a user seen in the chat, or None."""
+    row = get_reader().execute(GET_CHAT_MEMBER, (chat_id, user_id)).fetchone()
+    return tuple(row) if row else None
 
 
 def get_chat_language(chat_id: int) -> str:
     row = (
-        get_db()
+        get_reader()
         .execute("SELECT language FROM chats WHERE chat_id = ?", (chat_id,))
         .fetchone()
     )
@@ -107,28 +460,80 @@ def set_chat_language(chat_id: int, language: str) -> None:
     db.commit()
 
 
-def get_note(chat_id: int, name: str) -> tuple | None:
+def get_reply_cooldowns(chat_id: int) -> tuple[int, int]:
+    """Auto-reply cooldowns in seconds: (per trigger, per chat)."""
     row = (
-        get_db()
+        get_reader()
         .execute(
-            "SELECT name, content, parse_mode, file_id, file_type FROM notes WHERE chat_id = ? AND LOWER(name) = ?",
-            (chat_id, name.lower()),
+            "SELECT trigger_cooldown, chat_cooldown FROM chats WHERE chat_id = ?",
+            (chat_id,),
         )
         .fetchone()
     )
-    return tuple(row) if row else None
+    return (row[0], row[1]) if row else (0, 0)
 
 
-def get_note_by_index(chat_id: int, index: int) -> tuple | None:
+def set_reply_cooldowns(chat_id: int, trigger_seconds: int, chat_seconds: int) -> None:
+    db = get_db()
+    db.execute(
+        """
+        INSERT INTO chats (chat_id, trigger_cooldown, chat_cooldown) VALUES (?, ?, ?)
+        ON CONFLICT(chat_id) DO UPDATE SET
+            trigger_cooldown = excluded.trigger_cooldown,
+            chat_cooldown    = excluded.chat_cooldown
+        """,
+        (chat_id, trigger_seconds, chat_seconds),
+    )
+    db.commit()
+
+
+def get_missing_note_reply(chat_id: int) -> bool:
+    row = (
+        get_reader()
+        .execute("SELECT missing_note_reply FROM chats WHERE chat_id = ?", (chat_id,))
+        .fetchone()
+    )
+    return bool(row[0]) if row else True
+
+
+def set_missing_note_reply(chat_id: int, enabled: bool) -> None:
+    db = get_db()
+    db.execute(
+        """
+        INSERT INTO chats (chat_id, missing_note_reply) VALUES (?, ?)
+        ON CONFLICT(chat_id) DO UPDATE SET
+            missing_note_reply = excluded.missing_note_reply
+        """,
+        (chat_id, int(enabled)),
+    )
+    db.commit()
+
+
+def get_notes(chat_id: int, names: list[str]) -> list[tuple]:
+    if not names:
+        return []
+    placeholders = ", ".join("?" * len(names))
     rows = (
-        get_db()
+        get_reader()
         .execute(
-            "SELECT name, content, parse_mode, file_id, file_type FROM notes WHERE chat_id = ? ORDER BY name",
-            (chat_id,),
+            NOTE_COLUMNS
+            + f"WHERE notes.chat_id = ? AND notes.name IN ({placeholders})",
+            (chat_id, *(name.lower() for name in names)),
         )
         .fetchall()
     )
-    return rows[index - 1] if 0 < index <= len(rows) else None
+    return [_decode_note_row(row) for row in rows]
+
+
+def get_note_by_index(chat_id: int, index: int) -> tuple | None:
+    if index < 1:
+        return None
+    row = (
+        get_reader()
+        .execute(GET_NOTE_BY_INDEX, (chat_id, chat_id, index - 1))
+        .fetchone()
+    )
+    return _decode_note_row(row) if row else None
 
 
 def save_note(
@@ -139,80 +544,99 @@ def save_note(
     file_id: str | None = None,
     file_type: str | None = None,
 ) -> None:
+    """Store the note body once per distinct content and point the note at it."""
     db = get_db()
-    db.execute(
-        """
-        INSERT INTO notes (chat_id, name, content, parse_mode, file_id, file_type)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ON CONFLICT(chat_id, name) DO UPDATE SET
-            content    = excluded.content,
-            parse_mode = excluded.parse_mode,
-            file_id    = excluded.file_id,
-            file_type  = excluded.file_type
-        """,
-        (chat_id, name.lower(), content, parse_mode, file_id, file_type),
-    )
-    db.commit()
+    name = name.lower()
+    with db:
+        old = db.execute(GET_NOTE_HASH, (chat_id, name)).fetchone()
+        digest = _store_note_body(db, content, parse_mode, file_id, file_type)
+        db.execute(
+            """
+            INSERT INTO notes (chat_id, name, body_hash) VALUES (?, ?, ?)
+            ON CONFLICT(chat_id, name) DO UPDATE SET body_hash = excluded.body_hash
+            """,
+            (chat_id, name, digest),
+        )
+        if old and old[0] != digest:
+            db.execute(DROP_NOTE_BODY, (old[0], old[0]))
 
 
 def delete_note(chat_id: int, name: str) -> bool:
     db = get_db()
-    cursor = db.execute(
-        "DELETE FROM notes WHERE chat_id = ? AND LOWER(name) = ?",
-        (chat_id, name.lower()),
-    )
-    db.commit()
-    return cursor.rowcount > 0
+    with db:
+        row = db.execute(DELETE_NOTE, (chat_id, name.lower())).fetchone()
+        if row:
+            db.execute(DROP_NOTE_BODY, (row[0], row[0]))
+    return row is not None
+
+
+def collect_note_bodies() -> int:
+    """Drop note bodies no note refers to. Returns how many were removed."""
+    db = get_db()
+    with db:
+        cursor = db.execute(DROP_NOTE_BODIES)
+    return cursor.rowcount
 
 
 def list_notes(chat_id: int) -> list[str]:
     rows = (
-        get_db()
+        get_reader()
         .execute("SELECT name FROM notes WHERE chat_id = ? ORDER BY name", (chat_id,))
         .fetchall()
     )
     return [row[0] for row in rows]
 
 
-def add_warn(chat_id: int, user_id: int, reason: str | None = None) -> int:
+def list_notes_page(
+    chat_id: int,
+    limit: int,
+    after: str | None = None,
+    before: str | None = None,
+    offset: int = 0,
+) -> list[str]:
+    """
+    One page of note names in name order.
+    Pages by keyset when `after` or `before` is given, by `offset` otherwise.
+    """
+    db = get_reader()
+    if before is not None:
+        rows = db.execute(NOTES_BEFORE, (chat_id, before, limit)).fetchall()
+        rows.reverse()
+    elif after is not None:
+        rows = db.execute(NOTES_AFTER, (chat_id, after, limit)).fetchall()
+    else:
+        rows = db.execute(NOTES_AT, (chat_id, limit, offset)).fetchall()
+    return [row[0] for row in rows]
+
+
+def add_warn(chat_id: int, user_id: int, reason: str | None = None) -> tuple[int, int]:
+    """Store a warn. Returns (warn count, chat warn limit)."""
     db = get_db()
-    db.execute(
-        "INSERT INTO warns (chat_id, user_id, reason) VALUES (?, ?, ?)",
-        (chat_id, user_id, reason),
-    )
-    db.commit()
-    row = db.execute(
-        "SELECT COUNT(*) FROM warns WHERE chat_id = ? AND user_id = ?",
-        (chat_id, user_id),
-    ).fetchone()
-    return row[0]
+    with db:
+        db.execute(
+            "INSERT INTO warns (chat_id, user_id, reason) VALUES (?, ?, ?)",
+            (chat_id, user_id, reason),
+        )
+        count, limit = db.execute(BUMP_WARN_COUNT, (chat_id, user_id)).fetchall()[0]
+    return count, limit
 
 
 def get_warns(chat_id: int, user_id: int) -> list[tuple[str | None, str]]:
-    rows = (
-        get_db()
-        .execute(
-            "SELECT reason, added_at FROM warns WHERE chat_id = ? AND user_id = ? ORDER BY added_at",
-            (chat_id, user_id),
-        )
-        .fetchall()
-    )
+    rows = get_reader().execute(GET_WARNS, (chat_id, user_id)).fetchall()
     return rows
 
 
 def reset_warns(chat_id: int, user_id: int) -> bool:
     db = get_db()
-    cursor = db.execute(
-        "DELETE FROM warns WHERE chat_id = ? AND user_id = ?",
-        (chat_id, user_id),
-    )
-    db.commit()
+    with db:
+        cursor = db.execute(RESET_WARNS, (chat_id, user_id))
+        db.execute(RESET_WARN_COUNT, (chat_id, user_id))
     return cursor.rowcount > 0
 
 
 def get_warn_limit(chat_id: int) -> int:
     row = (
-        get_db()
+        get_reader()
         .execute("SELECT warn_limit FROM warn_settings WHERE chat_id = ?", (chat_id,))
         .fetchone()
     )
@@ -231,31 +655,47 @@ def set_warn_limit(chat_id: int, limit: int) -> None:
     db.commit()
 
 
-def save_filter(chat_id: int, keyword: str, response: str) -> None:
+def save_filter(
+    chat_id: int, keyword: str, response: str, mode: str = "substring"
+) -> None:
+    """Regex keywords are stored as typed; other modes match lowercased text."""
     db = get_db()
     db.execute(
         """
-        INSERT INTO filters (chat_id, keyword, response) VALUES (?, ?, ?)
-        ON CONFLICT(chat_id, keyword) DO UPDATE SET response = excluded.response
+        INSERT INTO filters (chat_id, keyword, response, mode) VALUES (?, ?, ?, ?)
+        ON CONFLICT(chat_id, keyword) DO UPDATE SET
+            response = excluded.response,
+            mode     = excluded.mode
         """,
-        (chat_id, keyword.lower(), response),
+        (chat_id, keyword if mode == "regex" else keyword.lower(), response, mode),
     )
     db.commit()
 
 
-def delete_filter(chat_id: int, keyword: str) -> bool:
+def delete_filter(chat_id: int, keyword: str) -> str | None:
+    """
+    Delete the regex filter spelled exactly `keyword`, or failing that the
+    plain filter for its lowercase form. Returns the deleted keyword.
+    """
     db = get_db()
-    cursor = db.execute(
-        "DELETE FROM filters WHERE chat_id = ? AND keyword = ?",
-        (chat_id, keyword.lower()),
-    )
-    db.commit()
-    return cursor.rowcount > 0
+    with db:
+        row = db.execute(
+            "DELETE FROM filters WHERE chat_id = ? AND keyword = ? AND mode = 'regex' "
+            "RETURNING keyword",
+            (chat_id, keyword),
+        ).fetchone()
+        if row is None:
+            row = db.execute(
+                "DELETE FROM filters WHERE chat_id = ? AND keyword = ? AND mode <> 'regex' "
+                "RETURNING keyword",
+                (chat_id, keyword.lower()),
+            ).fetchone()
+    return row[0] if row else None
 
 
 def list_filters(chat_id: int) -> list[str]:
     rows = (
-        get_db()
+        get_reader()
         .execute(
             "SELECT keyword FROM filters WHERE chat_id = ? ORDER BY keyword", (chat_id,)
         )
@@ -264,10 +704,12 @@ def list_filters(chat_id: int) -> list[str]:
     return [row[0] for row in rows]
 
 
-def get_filters(chat_id: int) -> list[tuple[str, str]]:
+def get_filters(chat_id: int) -> list[tuple[str, str, str]]:
     rows = (
-        get_db()
-        .execute("SELECT keyword, response FROM filters WHERE chat_id = ?", (chat_id,))
+        get_reader()
+        .execute(
+            "SELECT keyword, response, mode FROM filters WHERE chat_id = ?", (chat_id,)
+        )
         .fetchall()
     )
     return rows
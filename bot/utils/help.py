@@ -1,9 +1,18 @@
-from telegram import InlineKeyboardButton, helpers
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, helpers
 from typing import Dict, List
-from bot.utils.language import get_msg_string
+from bot.utils.language import get_update_language, lang_manager
 
 HELP_MODULES: Dict[str, dict] = {}
 
+# label -> section help key / owning module, rebuilt on every registration.
+_section_help: Dict[str, str] = {}
+_section_parent: Dict[str, str] = {}
+_frozen = False
+
+# (language, callback data) -> (text, keyboard), see get_menu().
+_menus: Dict[tuple[str, str], tuple[str, InlineKeyboardMarkup]] = {}
+lang_manager.on_reload(_menus.clear)
+
 
 def register_module_help(module_name: str, help_key: str, sections: dict | None = None):
     """
@@ -16,8 +25,24 @@ def register_module_help(module_name: str, help_key: str, sections: dict | None
             "Warns": "moderation.warn.help",
         })
     """
+    if _frozen:
+        raise RuntimeError(f"Help is frozen, can't register {module_name}")
     HELP_MODULES[module_name] = {"key": help_key, "sections": sections or {}}
 
+    _section_help.clear()
+    _section_parent.clear()
+    for name, module in HELP_MODULES.items():
+        for label, key in module["sections"].items():
+            _section_help[label] = key
+            _section_parent[label] = name
+    _menus.clear()
+
+
+def freeze_help() -> None:
+    """Stop accepting registrations; call once every module is loaded."""
+    global _frozen
+    _frozen = True
+
 
 def get_help_keyboard(back_text: str = "« Back") -> List[List[InlineKeyboardButton]]:
     buttons = [
@@ -50,22 +75,71 @@ def get_module_help(module_name: str) -> str | None:
 
 
 def get_section_help(label: str) -> str | None:
-    for module in HELP_MODULES.values():
-        if label in module["sections"]:
-            return module["sections"][label]
-    return None
+    return _section_help.get(label)
 
 
 def get_section_parent(label: str) -> str | None:
-    for name, module in HELP_MODULES.items():
-        if label in module["sections"]:
-            return name
+    return _section_parent.get(label)
+
+
+def _render_menu(lang: str, node: str) -> tuple[str, InlineKeyboardMarkup] | None:
+    def s(key):
+        return lang_manager.get_string(key, lang)
+
+    def back(callback_data):
+        return [[InlineKeyboardButton(s("common.back"), callback_data=callback_data)]]
+
+    if node == "start_main":
+        help_button = InlineKeyboardButton(
+            s("common.btn_help"), callback_data="help_main"
+        )
+        return s("common.start"), InlineKeyboardMarkup([[help_button]])
+
+    if node == "help_main":
+        return s("common.help"), InlineKeyboardMarkup(
+            get_help_keyboard(s("common.back"))
+        )
+
+    if node.startswith("help_mod_"):
+        name = node.removeprefix("help_mod_")
+        help_key = get_module_help(name)
+        if not help_key:
+            return None
+        keyboard = get_sections_keyboard(name, s("common.back")) or back("help_main")
+        return s(help_key), InlineKeyboardMarkup(keyboard)
+
+    if node.startswith("help_sec_"):
+        label = node.removeprefix("help_sec_")
+        help_key = get_section_help(label)
+        if not help_key:
+            return None
+        parent = get_section_parent(label)
+        return s(help_key), InlineKeyboardMarkup(back(f"help_mod_{parent}"))
+
     return None
 
 
+def get_menu(update, node: str) -> tuple[str, InlineKeyboardMarkup] | None:
+    """
+    Text and keyboard of a help/start menu node, named by its callback data
+    ("start_main", "help_main", "help_mod_<module>", "help_sec_<label>").
+    Rendered once per language; None for unknown nodes.
+    """
+    key = (lang_manager.resolve(get_update_language(update)), node)
+    menu = _menus.get(key)
+    if menu is None:
+        menu = _render_menu(*key)
+        if menu:
+            _menus[key] = menu
+    return menu
+
+
 def get_string_helper(update):
+    """(s, e): localized strings in the update's language, and escaping."""
+    lang = get_update_language(update)
+
     def s(key, **kwargs):
-        return get_msg_string(update, key, **kwargs)
+        return lang_manager.get_string(key, lang, **kwargs)
 
     def e(value):
         return helpers.escape_markdown(str(value), version=2)
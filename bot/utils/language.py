@@ -1,74 +1,328 @@
+import asyncio
+import hashlib
+import marshal
 import os
+import signal
+import string
+import time
 import yaml
 import logging
 
+from bot.config import Config
+from bot.utils import storage
+from bot.utils.cache import LRUCache
+
 
 logger = logging.getLogger(__name__)
 
+_formatter = string.Formatter()
+_BUNDLE_VERSION = 1
+
+
+def _flatten(data: dict, prefix: str = "") -> dict:
+    """{"a": {"b": "x"}} -> {"a.b": "x"}"""
+    flat = {}
+    for key, value in data.items():
+        full_key = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{full_key}."))
+        else:
+            flat[full_key] = value
+    return flat
+
+
+def _parse_format(text: str) -> tuple | None:
+    """
+    Split a str.format template into (literal, field, spec, conversion)
+    segments. None if the template needs str.format itself: positional or
+    dotted fields, nested specs, or braces that don't parse.
+    """
+    try:
+        segments = tuple(_formatter.parse(text))
+    except ValueError:
+        return None
+    for _, field, spec, _ in segments:
+        if field is not None and (not field.isidentifier() or "{" in spec):
+            return None
+    return segments
+
+
+def _render(segments: tuple, kwargs: dict) -> str:
+    parts = []
+    for literal, field, spec, conversion in segments:
+        parts.append(literal)
+        if field is not None:
+            value = kwargs[field]
+            if conversion:
+                value = _formatter.convert_field(value, conversion)
+            parts.append(format(value, spec))
+    return "".join(parts)
+
 
 class LanguageManager:
-    def __init__(self, languages_dir="bot/languages"):
+    """
+    Language catalogs flattened to {"dotted.key": string} per language, with
+    missing keys filled in from the default language at load time. Strings
+    with placeholders are parsed once so formatting skips str.format.
+    """
+
+    def __init__(self, languages_dir="bot/languages", cache_path=None):
         self.languages_dir = languages_dir
-        self.strings = {}
+        self.cache_path = cache_path
         self.default_language = "en"
+        # (strings, templates), replaced as a whole so readers never see a
+        # half-applied reload.
+        self._catalog: tuple[dict, dict] = ({}, {})
+        self._sources: dict[str, dict] = {}
+        self._mtimes: dict[str, float] = {}
+        self._reported: set[str] = set()
+        self._watcher: asyncio.Task | None = None
+        self._reload_lock = asyncio.Lock()
+        self._reload_callbacks: list = []
+        # filename -> (mtime, sha256, flattened strings) as last parsed.
+        self._bundle: dict[str, tuple] = self._read_bundle()
         self.load_languages()
 
+    @property
+    def strings(self) -> dict[str, dict]:
+        return self._catalog[0]
+
+    @property
+    def templates(self) -> dict[str, dict[str, tuple | None]]:
+        return self._catalog[1]
+
     def load_languages(self):
         if not os.path.exists(self.languages_dir):
             os.makedirs(self.languages_dir)
             return
+        start = time.perf_counter()
+        self._apply(self._load())
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"Loaded {len(self.strings)} languages in {elapsed:.1f}ms")
 
+    def _read_bundle(self) -> dict[str, tuple]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "rb") as f:
+                version, bundle = marshal.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring language cache {self.cache_path}: {e}")
+            return {}
+        return bundle if version == _BUNDLE_VERSION else {}
+
+    def _write_bundle(self) -> None:
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                marshal.dump((_BUNDLE_VERSION, self._bundle), f)
+            os.replace(tmp_path, self.cache_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not write language cache {self.cache_path}: {e}")
+
+    def _read_source(self, filepath: str, mtime: float) -> tuple[dict, bool]:
+        """
+        Flattened strings of one language file and whether they came from
+        the cache, which is trusted while the file's mtime or hash matches.
+        """
+        filename = os.path.basename(filepath)
+        cached = self._bundle.get(filename)
+        if cached and cached[0] == mtime:
+            return cached[2], True
+
+        with open(filepath, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if cached and cached[1] == digest:
+            self._bundle[filename] = (mtime, digest, cached[2])
+            return cached[2], True
+
+        data = yaml.safe_load(raw.decode("utf-8"))
+        flat = _flatten(data) if data else {}
+        self._bundle[filename] = (mtime, digest, flat)
+        return flat, False
+
+    def _scan(self) -> dict[str, float]:
+        mtimes = {}
         for filename in os.listdir(self.languages_dir):
             if filename.endswith(".yml") or filename.endswith(".yaml"):
-                lang_code = filename.split(".")[0]
                 filepath = os.path.join(self.languages_dir, filename)
                 try:
-                    with open(filepath, "r", encoding="utf-8") as f:
-                        data = yaml.safe_load(f)
-                        self.strings[lang_code] = data if data else {}
-                        logger.info(f"Loaded lang: {lang_code}")
-                except Exception as e:
-                    logger.error(f"Error loading {lang_code}: {e}")
+                    mtimes[filepath] = os.stat(filepath).st_mtime
+                except OSError:
+                    pass
+        return mtimes
 
-    def get_string(self, key, lang_code="en", **kwargs):
+    def _load(self, changed_only: bool = False) -> tuple | None:
+        """
+        Read the language files (only those whose mtime moved, if
+        `changed_only`) and build new catalogs without touching the live
+        ones. A file that fails to parse keeps its previous strings.
+        Returns what _apply() needs, or None if nothing changed.
+        """
+        mtimes = self._scan()
+        sources = dict(self._sources)
+        loaded = []
+        bundle_changed = False
+        for filepath, mtime in mtimes.items():
+            if changed_only and self._mtimes.get(filepath) == mtime:
+                continue
+            lang_code = os.path.basename(filepath).split(".")[0]
+            try:
+                sources[lang_code], cached = self._read_source(filepath, mtime)
+                loaded.append(lang_code)
+                bundle_changed |= not cached
+                logger.info(f"Loaded lang: {lang_code}{' (cached)' if cached else ''}")
+            except Exception as e:
+                logger.error(f"Error loading {lang_code}: {e}")
+
+        if bundle_changed:
+            self._write_bundle()
+        if not loaded:
+            self._mtimes = mtimes
+            return None
+        return sources, mtimes, self._build(sources)
+
+    def _apply(self, loaded: tuple | None) -> None:
+        if loaded is None:
+            return
+        self._sources, self._mtimes, self._catalog = loaded
+        self._reported.clear()
+        for callback in self._reload_callbacks:
+            callback()
+
+    def on_reload(self, callback) -> None:
+        """Call `callback()` whenever a new catalog is swapped in."""
+        self._reload_callbacks.append(callback)
+
+    def resolve(self, lang_code: str | None) -> str:
+        """The catalog get_string() would use for `lang_code`."""
         if lang_code:
             lang_code = lang_code[:2]
+        return lang_code if lang_code in self.strings else self.default_language
 
-        lang_strings = self.strings.get(
-            lang_code, self.strings.get(self.default_language, {})
-        )
-
-        keys = key.split(".")
-        value = lang_strings
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                if lang_code != self.default_language:
-                    return self.get_string(key, self.default_language, **kwargs)
-                return f"Missing key: {key}"
-
-        if kwargs and isinstance(value, str):
+    async def reload(self, changed_only: bool = True) -> bool:
+        """Rebuild the catalogs off the event loop and swap them in."""
+        async with self._reload_lock:
+            start = time.perf_counter()
+            loaded = await asyncio.to_thread(self._load, changed_only)
+            if loaded is None:
+                return False
+            self._apply(loaded)
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"Reloaded languages in {elapsed:.1f}ms")
+        return True
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
             try:
+                await self.reload()
+            except Exception:
+                logger.exception("Language reload failed")
+
+    def start_watching(self, interval: float) -> None:
+        """Poll the language files every `interval` seconds and reload on SIGHUP."""
+        loop = asyncio.get_running_loop()
+        if interval > 0 and self._watcher is None:
+            self._watcher = loop.create_task(self._watch(interval))
+        try:
+            loop.add_signal_handler(
+                signal.SIGHUP, lambda: loop.create_task(self.reload(False))
+            )
+        except (AttributeError, NotImplementedError):
+            pass
+
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+
+    def _build(self, sources: dict[str, dict]) -> tuple[dict, dict]:
+        default = sources.get(self.default_language, {})
+        strings, templates = {}, {}
+        for lang_code, flat in sources.items():
+            missing = default.keys() - flat.keys()
+            if missing:
+                logger.warning(
+                    f"{lang_code} is missing {len(missing)} keys, "
+                    f"using {self.default_language}: {', '.join(sorted(missing))}"
+                )
+            merged = {**default, **flat}
+            strings[lang_code] = merged
+            templates[lang_code] = {
+                key: _parse_format(value)
+                for key, value in merged.items()
+                if isinstance(value, str) and ("{" in value or "}" in value)
+            }
+        return strings, templates
+
+    def get_string(self, key, lang_code="en", **kwargs):
+        strings, templates = self._catalog
+        lang_code = self.resolve(lang_code)
+
+        value = strings.get(lang_code, {}).get(key)
+        if value is None:
+            if key not in self._reported:
+                self._reported.add(key)
+                logger.warning(f"Missing key: {key}")
+            return f"Missing key: {key}"
+
+        if not kwargs or key not in templates[lang_code]:
+            return value
+
+        segments = templates[lang_code][key]
+        try:
+            if segments is None:
                 return value.format(**kwargs)
-            except KeyError as e:
-                logger.warning(f"Format error {key}: {e}")
-                return value
+            return _render(segments, kwargs)
+        except (KeyError, IndexError, ValueError) as e:
+            logger.warning(f"Format error {key}: {e}")
+            return value
 
-        return value
 
+_chat_languages = LRUCache("chat_languages", Config.CHAT_SETTINGS_CACHE_ENTRIES)
+_generation = 0
+
+
+def get_update_language(update) -> str:
+    """
+    The language to answer `update` in: the chat's setting in groups, as
+    loaded by load_chat_language(). Never reads the database, so a chat
+    that isn't cached gets the default language.
+    """
+    chat = update.effective_chat if update else None
+    if chat and chat.type != "private":
+        return _chat_languages.get(chat.id) or lang_manager.default_language
+    if update and update.effective_user:
+        return update.effective_user.language_code or "en"
+    return "en"
 
-def get_msg_string(update, key, **kwargs):
-    from bot.utils.db import get_chat_language
 
-    if update and update.effective_chat and update.effective_chat.type != "private":
-        lang = get_chat_language(update.effective_chat.id)
-    elif update and update.effective_user:
-        lang = update.effective_user.language_code or "en"
-    else:
-        lang = "en"
-    return lang_manager.get_string(key, lang, **kwargs)
+async def load_chat_language(chat_id: int) -> str:
+    """Like get_update_language() for a group, but reads off the event loop."""
+    lang = _chat_languages.get(chat_id)
+    if lang is None:
+        generation = _generation
+        lang = await storage.get_chat_language(chat_id)
+        if _generation == generation:
+            _chat_languages.put(chat_id, lang)
+    return lang
+
+
+async def set_chat_language(chat_id: int, language: str) -> None:
+    global _generation
+    await storage.set_chat_language(chat_id, language)
+    _generation += 1
+    _chat_languages.put(chat_id, language)
+
+
+def get_msg_string(update, key, **kwargs):
+    return lang_manager.get_string(key, get_update_language(update), **kwargs)
 
 
-lang_manager = LanguageManager()
+lang_manager = LanguageManager(cache_path=Config.LANG_CACHE_PATH)
 get_string = lang_manager.get_string
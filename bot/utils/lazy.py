@@ -0,0 +1,34 @@
+import importlib
+import threading
+from types import ModuleType
+
+_lock = threading.Lock()
+
+
+class LazyModule(ModuleType):
+    """
+    Stands in for a module until one of its attributes is used, then imports
+    it. Lets bot modules keep heavy dependencies off the startup path.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            with _lock:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    """`module = lazy_import("package")`; imported on first attribute access."""
+    return LazyModule(name)
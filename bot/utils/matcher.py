@@ -0,0 +1,65 @@
+from collections import deque
+from typing import Iterable, Iterator
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a fixed list of keywords.
+
+    Matching walks the text once, so its cost depends on the text length
+    rather than on how many keywords there are. Keywords are identified by
+    their position in the list passed to the constructor; earlier keywords
+    win when several match.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+        self.size = 0
+
+        for index, keyword in enumerate(keywords):
+            self.size += 1
+            if keyword:
+                self._insert(keyword, index)
+        self._build()
+
+    def _insert(self, keyword: str, index: int) -> None:
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][char] = nxt
+            state = nxt
+        self._out[state] += (index,)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    @property
+    def states(self) -> int:
+        return len(self._goto)
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int]]:
+        """Yield (end offset, keyword index) for every occurrence in `text`."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for pos, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                yield pos + 1, index
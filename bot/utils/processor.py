@@ -0,0 +1,112 @@
+import asyncio
+from typing import Any, Awaitable
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+# Size of the base class semaphore, which must never be what blocks: an
+# update waiting behind its own chat can't be allowed to hold a slot. So
+# max_concurrent_updates is left alone and reports this, not `limit`.
+_UNBOUNDED = 2**31 - 1
+
+
+def _release(done: asyncio.Future) -> None:
+    if not done.done():
+        done.set_result(None)
+
+
+class _ChatQueue:
+    __slots__ = ("depth", "tail")
+
+    def __init__(self):
+        self.depth = 0
+        self.tail: asyncio.Future | None = None
+
+
+class ChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Runs updates from different chats concurrently, at most `limit` at a
+    time, while updates from the same chat run one after another in arrival
+    order. Updates without a chat are only bound by the limit.
+
+    Each chat's queue is a chain of futures, one per pending update, and is
+    dropped as soon as it drains.
+    """
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+        self.limit = limit
+        super().__init__(_UNBOUNDED)
+        self._slots = asyncio.Semaphore(limit)
+        self._chats: dict[int, _ChatQueue] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def current_concurrent_updates(self) -> int:
+        return self.in_flight
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]):
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            await self._run(coroutine)
+            return
+
+        queue = self._chats.get(chat.id)
+        if queue is None:
+            queue = self._chats[chat.id] = _ChatQueue()
+        previous, done = queue.tail, asyncio.get_running_loop().create_future()
+        queue.tail = done
+        queue.depth += 1
+
+        started = False
+        try:
+            if previous is not None:
+                # Shielded: cancelling this update must not cancel the
+                # previous one's future and let later updates jump ahead.
+                await asyncio.shield(previous)
+            started = True
+            await self._run(coroutine)
+        finally:
+            if not started and hasattr(coroutine, "close"):
+                coroutine.close()
+            queue.depth -= 1
+            if queue.depth == 0:
+                del self._chats[chat.id]
+            if not started and previous is not None and not previous.done():
+                # Cancelled while waiting: release the next update only once
+                # the one ahead of us has finished.
+                previous.add_done_callback(lambda _: _release(done))
+            else:
+                _release(done)
+
+    async def _run(self, coroutine: Awaitable[Any]) -> None:
+        async with self._slots:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                await coroutine
+            finally:
+                self.in_flight -= 1
+
+    def depths(self) -> dict[int, int]:
+        """Updates queued or running per chat, for chats with any pending."""
+        return {chat_id: queue.depth for chat_id, queue in self._chats.items()}
+
+    def stats(self) -> dict:
+        depths = self._chats.values()
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "chats": len(self._chats),
+            "queued": sum(queue.depth for queue in depths),
+            "max_chat_depth": max((queue.depth for queue in depths), default=0),
+        }
@@ -0,0 +1,234 @@
+"""
+Awaitable front-end for bot.utils.db.
+
+Every helper here runs its bot.utils.db counterpart off the event loop:
+writes on a single storage thread that owns the writer connection, reads on
+a small pool of threads with their own read-only connections. Handlers
+should import from this module instead of calling bot.utils.db directly.
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bot.config import Config
+from bot.utils import db
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+_read_executor = ThreadPoolExecutor(
+    max_workers=Config.DB_READERS, thread_name_prefix="sqlite-read"
+)
+
+
+async def run(func, *args, **kwargs):
+    """Run a blocking DB callable on the storage thread and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+async def run_read(func, *args, **kwargs):
+    """Like run(), but on the reader pool. `func` must only use db.get_reader()."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _read_executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+def _wrap(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run(func, *args, **kwargs)
+
+    return wrapper
+
+
+def _wrap_read(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_read(func, *args, **kwargs)
+
+    return wrapper
+
+
+class WriteBehindQueue:
+    """
+    Buffers upserts in memory, merging them by key, and hands them to
+    `flush_func` as one batch every `interval` seconds or as soon as
+    `max_rows` distinct keys are pending.
+    """
+
+    def __init__(self, name: str, flush_func, interval: float, max_rows: int):
+        self.name = name
+        self._flush_func = flush_func
+        self.interval = interval
+        self.max_rows = max_rows
+        self._pending: dict = {}
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def pending(self) -> list[tuple]:
+        return list(self._pending.values())
+
+    def get(self, key, default=None):
+        return self._pending.get(key, default)
+
+    def put(self, key, row: tuple) -> None:
+        self._pending[key] = row
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        if len(self._pending) >= self.max_rows:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        start = time.perf_counter()
+        try:
+            await run(self._flush_func, list(batch.values()))
+        except Exception:
+            logger.exception(f"Flush of {self.name} failed, keeping {len(batch)} rows")
+            for key, row in batch.items():
+                self._pending.setdefault(key, row)
+            return
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self.rows_flushed += len(batch)
+        self.last_flush_ms = elapsed
+        self.max_flush_ms = max(self.max_flush_ms, elapsed)
+        self.total_flush_ms += elapsed
+        logger.debug(f"Flushed {len(batch)} {self.name} rows in {elapsed:.1f}ms")
+
+    async def close(self) -> None:
+        """Stop the flush loop and write out whatever is still pending."""
+        self._closing = True
+        if self._task:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": self.max_flush_ms,
+            "avg_flush_ms": self.total_flush_ms / self.flushes if self.flushes else 0.0,
+        }
+
+
+user_writes = WriteBehindQueue(
+    "users",
+    db.save_users,
+    Config.USER_FLUSH_INTERVAL_MS / 1000,
+    Config.USER_FLUSH_MAX_ROWS,
+)
+
+
+member_writes = WriteBehindQueue(
+    "chat_members",
+    db.save_chat_members,
+    Config.USER_FLUSH_INTERVAL_MS / 1000,
+    Config.USER_FLUSH_MAX_ROWS,
+)
+
+
+def queue_user(user_id: int, username: str | None, full_name: str) -> None:
+    """Schedule a user upsert; it is written with the next users batch."""
+    user_writes.put(user_id, (user_id, username, full_name))
+
+
+def queue_chat_member(chat_id: int, user_id: int, status: str | None = None) -> None:
+    """
+    Record that the user was seen in the chat. `status` comes from
+    chat_member updates; None keeps whatever status is already known.
+    """
+    key = (chat_id, user_id)
+    if status is None:
+        pending = member_writes.get(key)
+        if pending:
+            status = pending[2]
+    member_writes.put(key, (chat_id, user_id, status))
+
+
+async def find_user(
+    chat_id: int, username: str
+) -> tuple[int, str | None, str, bool] | None:
+    wanted = username.lstrip("@").lower()
+    for row in user_writes.pending():
+        if row[1] and row[1].lower() == wanted:
+            return (*row, True)
+    return await run_read(db.find_user, chat_id, username)
+
+
+def stats() -> dict:
+    return {queue.name: queue.stats() for queue in (user_writes, member_writes)}
+
+
+async def shutdown() -> None:
+    """Flush write-behind queues, stop the storage threads and close the DB."""
+    await user_writes.close()
+    await member_writes.close()
+    await asyncio.to_thread(_read_executor.shutdown, wait=True)
+    await asyncio.to_thread(_executor.shutdown, wait=True)
+    db.close()
+
+
+get_chat_member = _wrap_read(db.get_chat_member)
+
+get_chat_language = _wrap_read(db.get_chat_language)
+set_chat_language = _wrap(db.set_chat_language)
+get_reply_cooldowns = _wrap_read(db.get_reply_cooldowns)
+set_reply_cooldowns = _wrap(db.set_reply_cooldowns)
+get_missing_note_reply = _wrap_read(db.get_missing_note_reply)
+set_missing_note_reply = _wrap(db.set_missing_note_reply)
+
+get_notes = _wrap_read(db.get_notes)
+get_note_by_index = _wrap_read(db.get_note_by_index)
+save_note = _wrap(db.save_note)
+delete_note = _wrap(db.delete_note)
+collect_note_bodies = _wrap(db.collect_note_bodies)
+list_notes = _wrap_read(db.list_notes)
+list_notes_page = _wrap_read(db.list_notes_page)
+
+add_warn = _wrap(db.add_warn)
+get_warns = _wrap_read(db.get_warns)
+reset_warns = _wrap(db.reset_warns)
+get_warn_limit = _wrap_read(db.get_warn_limit)
+set_warn_limit = _wrap(db.set_warn_limit)
+
+save_filter = _wrap(db.save_filter)
+delete_filter = _wrap(db.delete_filter)
+list_filters = _wrap_read(db.list_filters)
+delete_all_filters = _wrap(db.delete_all_filters)
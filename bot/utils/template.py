@@ -0,0 +1,76 @@
+import re
+from functools import lru_cache
+
+from telegram import Update, helpers
+from telegram.error import TelegramError
+
+FIELDS = ("mention", "username", "id", "first", "chatname", "count")
+
+# MarkdownV2 text carries braces escaped, so accept "{id}" and "\{id\}".
+_MARKDOWN_FIELD = re.compile(r"\\?\{(" + "|".join(FIELDS) + r")\\?\}")
+_PLAIN_FIELD = re.compile(r"\{(" + "|".join(FIELDS) + r")\}")
+
+
+def _escape(value) -> str:
+    return helpers.escape_markdown(str(value), version=2)
+
+
+class Template:
+    """
+    A filter or note body split once into literal and placeholder segments.
+
+    `markdown` says whether the source is already MarkdownV2 (notes) or plain
+    text (filters); plain literals are escaped at parse time so both render
+    to MarkdownV2. Placeholder values are escaped as they are filled in.
+    """
+
+    __slots__ = ("segments", "fields")
+
+    def __init__(self, text: str, markdown: bool = True):
+        pattern = _MARKDOWN_FIELD if markdown else _PLAIN_FIELD
+        segments = []
+        pos = 0
+        for match in pattern.finditer(text):
+            literal = text[pos : match.start()]
+            segments.append((literal if markdown else _escape(literal), match[1]))
+            pos = match.end()
+        tail = text[pos:]
+        segments.append((tail if markdown else _escape(tail), None))
+
+        self.segments = tuple(segments)
+        self.fields = frozenset(field for _, field in segments if field)
+
+    def render(self, values: dict) -> str:
+        if not self.fields:
+            return self.segments[0][0]
+        return "".join(
+            literal + (_escape(values.get(field, "")) if field else "")
+            for literal, field in self.segments
+        )
+
+
+@lru_cache(maxsize=1024)
+def get_template(text: str, markdown: bool = True) -> Template:
+    return Template(text, markdown)
+
+
+async def fill(template: Template, update: Update, user=None) -> str:
+    """Render `template` for `user` (the replied-to user for filters and notes)."""
+    if not template.fields:
+        return template.render({})
+
+    chat = update.effective_chat
+    values = {"chatname": chat.title or chat.full_name or ""}
+    if user:
+        values.update(
+            mention=f"@{user.username}" if user.username else user.full_name,
+            username=user.username or user.full_name,
+            id=user.id,
+            first=user.first_name,
+        )
+    if "count" in template.fields:
+        try:
+            values["count"] = await chat.get_member_count()
+        except TelegramError:
+            values["count"] = ""
+    return template.render(values)
@@ -1,6 +1,6 @@
 from telegram import Update, MessageEntity
 from telegram.error import TelegramError
-from bot.utils.db import get_db
+from bot.utils.storage import find_user, get_chat_member
 
 import re
 
@@ -23,22 +23,29 @@ async def resolve_target(update: Update, context):
         return ent.user.id, ent.user.username or ent.user.full_name
 
     if target.startswith("@"):
-        uid = get_user_id(target)
-        if uid:
-            try:
-                chat = await context.bot.get_chat(uid)
-                return chat.id, chat.username or chat.first_name
-            except TelegramError:
-                pass
+        known = await find_user(update.effective_chat.id, target)
+        if known and known[3]:
+            uid, username, full_name, _ = known
+            return uid, username or full_name
 
+        # A former holder may have passed the username on to someone we
+        # haven't seen; only fall back to them if Telegram can't tell us.
         try:
             chat = await context.bot.get_chat(target)
             return chat.id, chat.username or chat.first_name
         except TelegramError:
+            if known:
+                uid, username, full_name, _ = known
+                return uid, username or full_name
             return None, None
 
     if target.lstrip("-").isdigit():
         uid = int(target)
+        known = await get_chat_member(update.effective_chat.id, uid)
+        if known:
+            username, full_name, _ = known
+            return uid, username or full_name
+
         try:
             member = await update.effective_chat.get_member(uid)
             return member.user.id, member.user.username or member.user.full_name
@@ -50,12 +57,3 @@ async def resolve_target(update: Update, context):
                 return None, None
 
     return None, None
-
-
-def get_user_id(username: str) -> int | None:
-    username = username.lstrip("@").lower()
-    db = get_db()
-    row = db.execute(
-        "SELECT user_id FROM users WHERE LOWER(username) = ?", (username,)
-    ).fetchone()
-    return row[0] if row else None
@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# bot.config refuses to load without a token, and the language cache and
+# database default to the working tree.
+_data = tempfile.mkdtemp(prefix="ayumu-tests-")
+os.environ.setdefault("BOT_TOKEN", "123:test")
+os.environ.setdefault("LANG_CACHE_PATH", os.path.join(_data, "languages.cache"))
+
+from bot.utils import db  # noqa: E402
+
+db.DB_PATH = os.path.join(_data, "bot.db")
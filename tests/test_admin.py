@@ -0,0 +1,43 @@
+import asyncio
+from types import SimpleNamespace
+
+from telegram import Chat, ChatMember
+
+from bot.utils import admin
+
+
+class _Chat:
+    PRIVATE = Chat.PRIVATE
+
+    def __init__(self, chat_id: int, chat_type: str = Chat.SUPERGROUP):
+        self.id = chat_id
+        self.type = chat_type
+        self.calls = []
+
+    async def get_administrators(self, return_bots=None):
+        self.calls.append("get_administrators")
+        admins = [_member(1, ChatMember.OWNER)]
+        if return_bots:
+            admins.append(_member(50, ChatMember.ADMINISTRATOR))
+        return admins
+
+    async def get_member(self, user_id):
+        self.calls.append("get_member")
+        return _member(user_id, ChatMember.MEMBER)
+
+
+def _member(user_id: int, status: str):
+    return SimpleNamespace(user=SimpleNamespace(id=user_id), status=status)
+
+
+def test_admin_bots_are_in_the_roster():
+    chat = _Chat(-100)
+    assert asyncio.run(admin.get_admin_member(chat, 50)) is not None
+    assert asyncio.run(admin.get_admin_member(chat, 2)) is None
+    assert chat.calls == ["get_administrators"]
+
+
+def test_private_chats_skip_the_roster():
+    chat = _Chat(7, Chat.PRIVATE)
+    assert asyncio.run(admin.get_admin_member(chat, 7)) is None
+    assert chat.calls == ["get_member"]
@@ -0,0 +1,46 @@
+import pytest
+import regex
+
+from bot.modules.filters import REGEX, SUBSTRING, ChatFilters, compile_filter_regex
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        r"(a)\1",
+        r"(?P<name>a)",
+        r"(?<name>a)",
+        r"(?i)a",
+        r"a)|(b",
+        r"(a)(?1)",
+        r"(?0)",
+        r"(?R)",
+        r"(a)(?+1)(b)",
+        r"(a)(?-1)",
+        r"(?&name)",
+        r"(?P>name)",
+        r"(a)(?(1)b|c)",
+    ],
+)
+def test_uncombinable_regex_is_rejected(pattern):
+    with pytest.raises(regex.error):
+        compile_filter_regex(pattern)
+
+
+@pytest.mark.parametrize("pattern", [r"h[ae]llo", r"(?:ab)+", r"(?<=x)y", r"\d{3}"])
+def test_plain_regex_is_accepted(pattern):
+    compile_filter_regex(pattern)
+
+
+def test_regex_filters_match_independently():
+    chat_filters = ChatFilters(
+        [
+            ("hello", "hi", SUBSTRING),
+            ("b(a)a", "first", REGEX),
+            ("x+y", "second", REGEX),
+        ]
+    )
+    assert chat_filters.match("oh HELLO there") == 0
+    assert chat_filters.match("baa") == 1
+    assert chat_filters.match("zxxy") == 2
+    assert chat_filters.match("nothing") is None
@@ -0,0 +1,95 @@
+import asyncio
+
+from telegram import Chat, Message, Update, User
+
+from bot.utils.processor import ChatUpdateProcessor
+
+
+def _update(update_id: int, chat_id: int) -> Update:
+    chat = Chat(chat_id, Chat.GROUP)
+    return Update(update_id, message=Message(update_id, 0, chat, User(1, "a", False)))
+
+
+def test_busy_chat_does_not_hold_other_chats_back():
+    async def main():
+        processor = ChatUpdateProcessor(2)
+        release = asyncio.Event()
+        started = []
+
+        async def work(update, block=False):
+            started.append(update.update_id)
+            if block:
+                await release.wait()
+
+        a1, a2, a3, b1 = _update(1, 1), _update(2, 1), _update(3, 1), _update(4, 2)
+        tasks = [
+            asyncio.create_task(processor.process_update(a1, work(a1, block=True))),
+            asyncio.create_task(processor.process_update(a2, work(a2))),
+            asyncio.create_task(processor.process_update(a3, work(a3))),
+            asyncio.create_task(processor.process_update(b1, work(b1))),
+        ]
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert started == [1, 4]
+        assert processor.depths() == {1: 3}
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert started == [1, 4, 2, 3]
+        assert processor.depths() == {}
+
+    asyncio.run(main())
+
+
+def test_limit_bounds_updates_across_chats():
+    async def main():
+        processor = ChatUpdateProcessor(2)
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+
+        updates = [_update(i, i) for i in range(4)]
+        tasks = [
+            asyncio.create_task(processor.process_update(u, work())) for u in updates
+        ]
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert processor.current_concurrent_updates == 2
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert processor.stats()["max_in_flight"] == 2
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_keeps_chat_order():
+    async def main():
+        processor = ChatUpdateProcessor(2)
+        release = asyncio.Event()
+        log = []
+
+        async def work(update_id, block=False):
+            log.append(("start", update_id))
+            if block:
+                await release.wait()
+            log.append(("end", update_id))
+
+        tasks = [
+            asyncio.create_task(
+                processor.process_update(_update(i, 1), work(i, block=i == 1))
+            )
+            for i in (1, 2, 3)
+        ]
+        for _ in range(5):
+            await asyncio.sleep(0)
+        tasks[1].cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert log == [("start", 1), ("end", 1), ("start", 3), ("end", 3)]
+        assert processor.depths() == {}
+
+    asyncio.run(main())